@@ -147,8 +147,10 @@ async def google_select_calendar(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+# Sync def: the provider calls and token refresh block, so FastAPI runs
+# this in its threadpool instead of on the event loop
 @router.post("/google/{calendar_id}/sync")
-async def google_sync_calendar(
+def google_sync_calendar(
     calendar_id: UUID,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -292,8 +294,10 @@ async def microsoft_select_calendar(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+# Sync def: the provider calls and token refresh block, so FastAPI runs
+# this in its threadpool instead of on the event loop
 @router.post("/microsoft/{calendar_id}/sync")
-async def microsoft_sync_calendar(
+def microsoft_sync_calendar(
     calendar_id: UUID,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -13,6 +13,8 @@ from app.api.v1.dependencies import get_db, get_current_user
 from app.models.invoice import Invoice
 from app.models.time_entry import TimeEntry
 from app.schemas.invoice import InvoiceResponse
+from app.services.notifications.queue import get_notification_queue
+from app.services.notifications.slack import SlackNotificationService
 
 
 class MessageResponse(BaseModel):
@@ -22,28 +24,19 @@ class MessageResponse(BaseModel):
 router = APIRouter(prefix="/api/v1/notifications", tags=["notifications"])
 
 # Lazy load email and slack services to avoid initialization errors during testing
-_email_service = None
-_slack_service = None
-
 def get_email_service():
-    global _email_service
-    if _email_service is None:
-        from app.services.notifications.email import EmailNotificationService
-        try:
-            _email_service = EmailNotificationService()
-        except (ValueError, Exception):
-            return None
-    return _email_service
+    from app.services.notifications.email import get_email_notification_service
+    try:
+        return get_email_notification_service()
+    except (ValueError, Exception):
+        return None
 
 def get_slack_service():
-    global _slack_service
-    if _slack_service is None:
-        from app.services.notifications.slack import SlackNotificationService
-        try:
-            _slack_service = SlackNotificationService()
-        except (ValueError, Exception):
-            return None
-    return _slack_service
+    from app.services.notifications.slack import get_slack_notification_service
+    try:
+        return get_slack_notification_service()
+    except (ValueError, Exception):
+        return None
 
 
 @router.post("/send-invoice-email", response_model=MessageResponse)
@@ -142,8 +135,10 @@ async def send_invoice_slack(
         client_name = invoice.client.name if invoice.client else "Client"
         amount_cents = int(invoice.amount * 100)
 
-        # Send notification
-        success = slack_service.send_invoice_notification(
+        # Deliver in the background so a slow Slack API doesn't hold the request
+        get_notification_queue().submit(
+            "slack",
+            slack_service.send_invoice_notification,
             channel=channel,
             invoice_number=invoice.invoice_number,
             client_name=client_name,
@@ -151,11 +146,8 @@ async def send_invoice_slack(
             status="sent",
         )
 
-        if not success:
-            raise Exception("Failed to send Slack message")
-
         return MessageResponse(
-            message="Invoice notification sent to Slack",
+            message="Invoice notification queued for Slack",
             success=True,
         )
 
@@ -261,19 +253,18 @@ async def send_payment_slack(
         # Get invoice details
         client_name = invoice.client.name if invoice.client else "Client"
 
-        # Send notification
-        success = slack_service.send_payment_notification(
+        # Deliver in the background so a slow Slack API doesn't hold the request
+        get_notification_queue().submit(
+            "slack",
+            slack_service.send_payment_notification,
             channel=channel,
             invoice_number=invoice.invoice_number,
             client_name=client_name,
             amount_cents=payment_amount_cents,
         )
 
-        if not success:
-            raise Exception("Failed to send Slack message")
-
         return MessageResponse(
-            message="Payment notification sent to Slack",
+            message="Payment notification queued for Slack",
             success=True,
         )
 
@@ -352,19 +343,18 @@ async def send_alert_slack(
         # Create Slack service
         slack_service = SlackNotificationService(slack_bot_token)
 
-        # Send notification
-        success = slack_service.send_alert(
+        # Deliver in the background so a slow Slack API doesn't hold the request
+        get_notification_queue().submit(
+            "slack",
+            slack_service.send_alert,
             channel=channel,
             title=alert_title,
             message=alert_message,
             alert_type=alert_type,
         )
 
-        if not success:
-            raise Exception("Failed to send Slack message")
-
         return MessageResponse(
-            message="Alert sent to Slack",
+            message="Alert queued for Slack",
             success=True,
         )
 
@@ -505,9 +495,9 @@ async def test_slack_notification(
     Validates Slack integration is properly configured.
     """
     try:
-        from app.config.settings import Settings
+        from app.config.settings import get_settings
 
-        settings = Settings()
+        settings = get_settings()
         slack_service = SlackNotificationService(slack_bot_token=settings.slack_bot_token)
 
         if not settings.slack_bot_token:
@@ -557,9 +547,9 @@ async def notification_config_status(
     Shows which providers are configured and helps diagnose issues.
     """
     try:
-        from app.config.settings import Settings
+        from app.config.settings import get_settings
 
-        settings = Settings()
+        settings = get_settings()
 
         return {
             "email": {
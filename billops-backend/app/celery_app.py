@@ -1,7 +1,7 @@
 """Celery application initialization."""
 import os
 from celery import Celery
-from celery.signals import task_prerun, task_postrun, task_failure
+from celery.signals import task_prerun, task_postrun, task_failure, worker_process_init
 import logging
 
 logger = logging.getLogger(__name__)
@@ -38,11 +38,41 @@ def task_postrun_handler(sender=None, task_id=None, task=None, result=None, **kw
     logger.info(f"Task {task.name} [{task_id}] completed successfully")
 
 
+@task_postrun.connect
+def close_task_session(**kwargs):
+    """Close the task's scoped session, whatever the task's outcome."""
+    from app.db.session import TaskSession
+
+    TaskSession.remove()
+
+
 @task_failure.connect
 def task_failure_handler(sender=None, task_id=None, exception=None, **kwargs):
     """Log when a task fails."""
     logger.error(f"Task {sender.name} [{task_id}] failed with exception: {exception}", exc_info=True)
 
 
+@worker_process_init.connect
+def worker_process_init_handler(**kwargs):
+    """Build shared clients in each worker process before its first task."""
+    from app.db.session import engine
+    from app.services.invoices import generator
+    from app.services.storage.s3 import get_s3_client
+
+    # Drop pooled connections inherited from the parent without closing
+    # them, so the forked child never shares the parent's sockets
+    engine.dispose(close=False)
+
+    try:
+        get_s3_client()
+    except Exception as e:
+        logger.warning(f"S3 client prewarm failed: {e}")
+
+    try:
+        generator.warm_up()
+    except Exception as e:
+        logger.warning(f"Invoice generator prewarm failed: {e}")
+
+
 # Ensure backwards compatibility
 celery = celery_app
@@ -1,5 +1,5 @@
 from sqlalchemy import create_engine, event, Engine
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.orm import scoped_session, sessionmaker, Session
 
 from app.config.settings import get_settings
 
@@ -11,6 +11,10 @@ engine = create_engine(
     echo=settings.environment == "development",
     future=True,
     pool_pre_ping=True,  # Verify connections before using
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_recycle=settings.db_pool_recycle,
+    query_cache_size=1200,  # Compiled SQL cache entries (default 500)
 )
 
 # Session factory
@@ -21,6 +25,10 @@ SessionLocal = sessionmaker(
     autoflush=False,
 )
 
+# Session shared by everything running inside one Celery task; the worker's
+# task_postrun handler removes it, so tasks don't close it themselves
+TaskSession = scoped_session(SessionLocal)
+
 
 def get_db() -> Session:
     """Dependency for FastAPI to get DB session."""
@@ -1,8 +1,14 @@
+from app.services.notifications.queue import get_notification_queue
+
+# Seconds to wait for queued notification sends to go out on shutdown
+_NOTIFICATION_DRAIN_TIMEOUT = 10.0
+
+
 def on_startup() -> None:
     # TODO: add startup hooks (DB, cache, etc.)
     return None
 
 
 def on_shutdown() -> None:
-    # TODO: add shutdown hooks
-    return None
+    # Deliver sends still queued in-process before the worker thread dies
+    get_notification_queue().shutdown(timeout=_NOTIFICATION_DRAIN_TIMEOUT)
@@ -4,6 +4,7 @@ from fastapi.openapi.utils import get_openapi
 import time
 import logging
 
+from app.events import on_shutdown, on_startup
 from app.api.v1.routes import auth, clients, projects, time_entries, billing_rules, invoices, payments, users, integrations, notifications
 from app.services.analytics import get_analytics, EventType
 
@@ -171,6 +172,10 @@ def redoc():
     """ReDoc API documentation."""
     return {"redoc_url": "/api/redoc", "message": "Use /api/redoc for ReDoc"}
 
+# Lifecycle hooks
+app.add_event_handler("startup", on_startup)
+app.add_event_handler("shutdown", on_shutdown)
+
 # Include v1 routers
 app.include_router(auth.router, prefix="/api/v1", tags=["auth"])
 app.include_router(users.router, prefix="/api/v1", tags=["users"])
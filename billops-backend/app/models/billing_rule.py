@@ -26,5 +26,5 @@ class BillingRule(Base):
     updated_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
 
     # Relationships
-    project = relationship("Project", back_populates="billing_rules")
+    project = relationship("Project", back_populates="billing_rules", foreign_keys=[project_id])
     time_entries = relationship("TimeEntry", back_populates="billing_rule")
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -18,5 +18,16 @@ class Payment(Base):
     reference = Column(String(255), nullable=True)
     created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
 
+    __table_args__ = (
+        # Serves get_by_invoice ordering and per-invoice totals from the index alone
+        Index(
+            "ix_payments_invoice_id_received_at",
+            invoice_id,
+            received_at.desc(),
+            postgresql_include=["amount_cents"],
+        ),
+        Index("ix_payments_method", method),
+    )
+
     # Relationships
     invoice = relationship("Invoice", back_populates="payments")
@@ -21,5 +21,5 @@ class Project(Base):
 
     # Relationships
     client = relationship("Client", back_populates="projects")
-    billing_rules = relationship("BillingRule", back_populates="project")
+    billing_rules = relationship("BillingRule", back_populates="project", foreign_keys="BillingRule.project_id")
     time_entries = relationship("TimeEntry", back_populates="project")
@@ -1,10 +1,40 @@
 """CRUD service for BillingRule model."""
+import threading
+import time
+from dataclasses import dataclass
 from uuid import UUID
 from sqlalchemy.orm import Session
 
 from app.models.billing_rule import BillingRule
 from app.schemas.billing_rule import BillingRuleCreate, BillingRuleUpdate
 
+# Active-rule lookups are shared by every invoice task in a billing run
+_ACTIVE_RULE_TTL_SECONDS = 60.0
+_ACTIVE_RULE_CACHE_SIZE = 1024
+
+
+@dataclass(frozen=True, slots=True)
+class ActiveBillingRule:
+    """Session-independent snapshot of the fields invoice generation needs."""
+
+    id: UUID
+    rule_type: str
+    rate_cents: int
+    rounding_increment_minutes: int | None
+
+
+_active_rule_cache: dict[UUID, tuple[float, ActiveBillingRule | None]] = {}
+_active_rule_lock = threading.Lock()
+
+
+def invalidate_active_rule(project_id: UUID | None = None) -> None:
+    """Drop cached active rules for a project, or for every project if None."""
+    with _active_rule_lock:
+        if project_id is None:
+            _active_rule_cache.clear()
+        else:
+            _active_rule_cache.pop(project_id, None)
+
 
 class BillingRuleService:
     """Service for BillingRule CRUD operations."""
@@ -25,6 +55,7 @@ class BillingRuleService:
         db.add(db_rule)
         db.commit()
         db.refresh(db_rule)
+        invalidate_active_rule(db_rule.project_id)
         return db_rule
 
     @staticmethod
@@ -51,6 +82,46 @@ class BillingRuleService:
             (BillingRule.effective_to == None) | (BillingRule.effective_to > now),
         ).order_by(BillingRule.effective_from.desc()).first()
 
+    @staticmethod
+    def get_active_cached(db: Session, project_id: UUID) -> ActiveBillingRule | None:
+        """
+        Get a snapshot of the active billing rule, cached per project.
+
+        Entries live for a short TTL so that bulk billing runs hit the
+        database once per project. Changes made through this service
+        invalidate the local cache immediately; other processes see them
+        once the TTL expires.
+
+        Args:
+            db: Database session.
+            project_id: Project to look up.
+
+        Returns:
+            The active rule snapshot, or None if the project has no active rule.
+        """
+        now = time.monotonic()
+        with _active_rule_lock:
+            cached = _active_rule_cache.get(project_id)
+            if cached is not None and cached[0] > now:
+                return cached[1]
+
+        rule = BillingRuleService.get_active_for_project(db, project_id)
+        snapshot = None
+        if rule is not None:
+            snapshot = ActiveBillingRule(
+                id=rule.id,
+                rule_type=rule.rule_type,
+                rate_cents=rule.rate_cents,
+                rounding_increment_minutes=rule.rounding_increment_minutes,
+            )
+
+        with _active_rule_lock:
+            if project_id not in _active_rule_cache and len(_active_rule_cache) >= _ACTIVE_RULE_CACHE_SIZE:
+                # Evict the oldest entry (dicts keep insertion order)
+                del _active_rule_cache[next(iter(_active_rule_cache))]
+            _active_rule_cache[project_id] = (now + _ACTIVE_RULE_TTL_SECONDS, snapshot)
+        return snapshot
+
     @staticmethod
     def get_all(db: Session, skip: int = 0, limit: int = 50) -> list[BillingRule]:
         """Get all billing rules with pagination."""
@@ -73,12 +144,15 @@ class BillingRuleService:
         if not db_rule:
             return None
 
+        old_project_id = db_rule.project_id
         update_data = rule_data.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_rule, key, value)
 
         db.commit()
         db.refresh(db_rule)
+        invalidate_active_rule(old_project_id)
+        invalidate_active_rule(db_rule.project_id)
         return db_rule
 
     @staticmethod
@@ -97,8 +171,10 @@ class BillingRuleService:
         if not db_rule:
             return False
 
+        project_id = db_rule.project_id
         db.delete(db_rule)
         db.commit()
+        invalidate_active_rule(project_id)
         return True
 
     @staticmethod
@@ -1,15 +1,64 @@
-"""Email service with support for SendGrid and AWS SES."""
+"""Email service with support for SendGrid, AWS SES and SMTP."""
 from __future__ import annotations
 
 import logging
+import re
+import smtplib
 from typing import Any
 from abc import ABC, abstractmethod
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.mime.base import MIMEBase
+from email import encoders
 
 from app.config.settings import get_settings
+from app.services.email_pool import SMTPConnectionPool, open_smtp_connection
 
 logger = logging.getLogger(__name__)
 
 
+def _build_mime_message(
+    from_header: str,
+    to_email: str,
+    subject: str,
+    html_content: str,
+    text_content: str | None = None,
+    cc: list[str] | None = None,
+    reply_to: str | None = None,
+    attachments: dict[str, bytes] | None = None,
+) -> MIMEMultipart:
+    """Build a multipart MIME message with optional text part and attachments."""
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject
+    msg["From"] = from_header
+    msg["To"] = to_email
+
+    if cc:
+        msg["Cc"] = ", ".join(cc)
+    if reply_to:
+        msg["Reply-To"] = reply_to
+
+    # Add text and HTML parts
+    if text_content:
+        msg.attach(MIMEText(text_content, "plain"))
+    msg.attach(MIMEText(html_content, "html"))
+
+    # Add attachments
+    if attachments:
+        for filename, content in attachments.items():
+            part = MIMEBase("application", "octet-stream")
+            part.set_payload(content)
+            encoders.encode_base64(part)
+            part.add_header(
+                "Content-Disposition",
+                "attachment",
+                filename=filename,
+            )
+            msg.attach(part)
+
+    return msg
+
+
 class EmailProvider(ABC):
     """Abstract base class for email providers."""
 
@@ -220,39 +269,16 @@ class AWSEmailProvider(EmailProvider):
     ) -> bool:
         """Send email with attachments using raw email format."""
         try:
-            from email.mime.multipart import MIMEMultipart
-            from email.mime.text import MIMEText
-            from email.mime.base import MIMEBase
-            from email import encoders
-
-            # Create message
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = subject
-            msg["From"] = f"{self.settings.from_name} <{self.settings.from_email}>"
-            msg["To"] = to_email
-
-            if cc:
-                msg["Cc"] = ", ".join(cc)
-            if reply_to:
-                msg["Reply-To"] = reply_to
-
-            # Add text and HTML parts
-            if text_content:
-                msg.attach(MIMEText(text_content, "plain"))
-            msg.attach(MIMEText(html_content, "html"))
-
-            # Add attachments
-            if attachments:
-                for filename, content in attachments.items():
-                    part = MIMEBase("application", "octet-stream")
-                    part.set_payload(content)
-                    encoders.encode_base64(part)
-                    part.add_header(
-                        "Content-Disposition",
-                        "attachment",
-                        filename=filename,
-                    )
-                    msg.attach(part)
+            msg = _build_mime_message(
+                from_header=f"{self.settings.from_name} <{self.settings.from_email}>",
+                to_email=to_email,
+                subject=subject,
+                html_content=html_content,
+                text_content=text_content,
+                cc=cc,
+                reply_to=reply_to,
+                attachments=attachments,
+            )
 
             # Send raw email
             response = self.ses_client.send_raw_email(
@@ -269,11 +295,165 @@ class AWSEmailProvider(EmailProvider):
             return False
 
 
+class SMTPEmailProvider(EmailProvider):
+    """SMTP email provider with a persistent, lazily opened connection.
+
+    The connection is opened on the first send and reused for subsequent
+    messages, so batch notifications pay the TCP/TLS/AUTH handshake once.
+    A NOOP probe detects connections dropped by the server, which are
+    transparently re-established. When a pool is given, each send checks
+    a connection out of the shared pool instead.
+    """
+
+    def __init__(self, pool: SMTPConnectionPool | None = None):
+        self.settings = get_settings()
+        if not self.settings.smtp_host:
+            raise ValueError("SMTP host not configured")
+        self.pool = pool
+        self._smtp: smtplib.SMTP | None = None
+
+    def _connect(self) -> smtplib.SMTP:
+        """Open and authenticate a new SMTP connection."""
+        return open_smtp_connection(self.settings)
+
+    def get_persistent_smtp(self) -> smtplib.SMTP:
+        """Return the cached SMTP connection, reconnecting if it went stale."""
+        if self._smtp is not None:
+            try:
+                status, _ = self._smtp.noop()
+                if status == 250:
+                    return self._smtp
+            except smtplib.SMTPException:
+                pass
+            self.close()
+
+        self._smtp = self._connect()
+        return self._smtp
+
+    def close(self) -> None:
+        """Close the cached SMTP connection, if any."""
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except smtplib.SMTPException:
+            self._smtp.close()
+        finally:
+            self._smtp = None
+
+    def _send_message(
+        self,
+        smtp: smtplib.SMTP,
+        msg: MIMEMultipart,
+        recipients: list[str],
+    ) -> None:
+        """Send a message, pipelining the envelope when the server allows it."""
+        if smtp.has_extn("pipelining"):
+            self._send_pipelined(smtp, self.settings.from_email, recipients, msg)
+        else:
+            smtp.send_message(msg, from_addr=self.settings.from_email, to_addrs=recipients)
+
+    @staticmethod
+    def _send_pipelined(
+        smtp: smtplib.SMTP,
+        from_addr: str,
+        recipients: list[str],
+        msg: MIMEMultipart,
+    ) -> None:
+        """Send MAIL FROM, every RCPT TO and DATA in one write (RFC 2920).
+
+        Replies are then read back in command order, so the envelope costs a
+        single round trip instead of one per command.
+
+        Raises:
+            SMTPSenderRefused: If the server rejects the sender
+            SMTPRecipientsRefused: If every recipient is rejected
+            SMTPDataError: If the server refuses the DATA command or body
+        """
+        commands = [f"MAIL FROM:{smtplib.quoteaddr(from_addr)}"]
+        commands.extend(f"RCPT TO:{smtplib.quoteaddr(addr)}" for addr in recipients)
+        commands.append("DATA")
+        smtp.send("".join(f"{command}\r\n" for command in commands))
+
+        mail_code, mail_resp = smtp.getreply()
+        refused = {}
+        for addr in recipients:
+            code, resp = smtp.getreply()
+            if code not in (250, 251):
+                refused[addr] = (code, resp)
+        data_code, data_resp = smtp.getreply()
+
+        if mail_code != 250 or data_code != 354 or len(refused) == len(recipients):
+            if data_code == 354:
+                # Server is waiting for a body; terminate it empty before RSET
+                smtp.send(".\r\n")
+                smtp.getreply()
+            smtp.rset()
+            if mail_code != 250:
+                raise smtplib.SMTPSenderRefused(mail_code, mail_resp, from_addr)
+            if len(refused) == len(recipients):
+                raise smtplib.SMTPRecipientsRefused(refused)
+            raise smtplib.SMTPDataError(data_code, data_resp)
+
+        body = msg.as_bytes(policy=msg.policy.clone(linesep="\r\n"))
+        body = re.sub(rb"(?m)^\.", b"..", body)
+        if not body.endswith(b"\r\n"):
+            body += b"\r\n"
+        smtp.send(body + b".\r\n")
+        code, resp = smtp.getreply()
+        if code != 250:
+            raise smtplib.SMTPDataError(code, resp)
+
+    def send_email(
+        self,
+        to_email: str,
+        subject: str,
+        html_content: str,
+        text_content: str | None = None,
+        cc: list[str] | None = None,
+        bcc: list[str] | None = None,
+        reply_to: str | None = None,
+        attachments: dict[str, bytes] | None = None,
+    ) -> bool:
+        """Send email via SMTP, reusing the persistent connection."""
+        try:
+            msg = _build_mime_message(
+                from_header=f"{self.settings.from_name} <{self.settings.from_email}>",
+                to_email=to_email,
+                subject=subject,
+                html_content=html_content,
+                text_content=text_content,
+                cc=cc,
+                reply_to=reply_to,
+                attachments=attachments,
+            )
+            recipients = [to_email] + (cc or []) + (bcc or [])
+
+            if self.pool is not None:
+                with self.pool.acquire(timeout=self.settings.smtp_timeout) as smtp:
+                    self._send_message(smtp, msg, recipients)
+            else:
+                try:
+                    self._send_message(self.get_persistent_smtp(), msg, recipients)
+                except smtplib.SMTPServerDisconnected:
+                    # Server dropped us between the NOOP probe and the send
+                    self.close()
+                    self._send_message(self.get_persistent_smtp(), msg, recipients)
+
+            logger.info(f"Email sent successfully to {to_email} via SMTP")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error sending email via SMTP: {e}", exc_info=True)
+            return False
+
+
 class EmailService:
     """Main email service that delegates to configured provider."""
 
-    def __init__(self):
+    def __init__(self, pool: SMTPConnectionPool | None = None):
         self.settings = get_settings()
+        self.pool = pool
         self.provider = self._initialize_provider()
 
     def _initialize_provider(self) -> EmailProvider:
@@ -294,9 +474,33 @@ class EmailService:
                 logger.error(f"Failed to initialize AWS SES: {e}")
                 raise
 
+        elif provider_type == "smtp":
+            try:
+                return SMTPEmailProvider(pool=self.pool)
+            except ValueError as e:
+                logger.error(f"Failed to initialize SMTP: {e}")
+                raise
+
         else:
             raise ValueError(f"Unknown email provider: {provider_type}")
 
+    def get_persistent_smtp(self) -> smtplib.SMTP | None:
+        """Return the provider's persistent SMTP connection, if it has one."""
+        if isinstance(self.provider, SMTPEmailProvider):
+            return self.provider.get_persistent_smtp()
+        return None
+
+    def close(self) -> None:
+        """Release any persistent provider connection."""
+        if isinstance(self.provider, SMTPEmailProvider):
+            self.provider.close()
+
+    def __enter__(self) -> EmailService:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
     def send_email(
         self,
         to_email: str,
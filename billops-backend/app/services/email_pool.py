@@ -0,0 +1,175 @@
+"""Process-wide SMTP connection pool for concurrent notification senders."""
+from __future__ import annotations
+
+import logging
+import queue
+import smtplib
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from app.config.settings import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def open_smtp_connection(settings: Settings) -> smtplib.SMTP:
+    """Open and authenticate a new SMTP connection from settings.
+
+    Args:
+        settings: Application settings with SMTP configuration
+
+    Returns:
+        Connected (and logged in, if credentials are set) SMTP client
+    """
+    if settings.smtp_use_ssl:
+        smtp = smtplib.SMTP_SSL(
+            settings.smtp_host,
+            settings.smtp_port,
+            timeout=settings.smtp_timeout,
+        )
+    else:
+        smtp = smtplib.SMTP(
+            settings.smtp_host,
+            settings.smtp_port,
+            timeout=settings.smtp_timeout,
+        )
+        if settings.smtp_use_tls:
+            smtp.starttls()
+
+    smtp.ehlo()
+    if settings.smtp_username:
+        smtp.login(settings.smtp_username, settings.smtp_password or "")
+    return smtp
+
+
+class SMTPConnectionPool:
+    """Bounded pool of SMTP connections shared between threads.
+
+    At most ``size`` connections exist at once (idle plus checked out).
+    Each connection is recycled after ``max_messages`` sends so that
+    long-lived sessions do not hit server-side per-connection limits.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], smtplib.SMTP],
+        size: int = 5,
+        max_messages: int = 100,
+    ):
+        if size <= 0:
+            raise ValueError("SMTP pool size must be positive")
+        self._connect = connect
+        self.size = size
+        self.max_messages = max_messages
+        self._idle: queue.LifoQueue[smtplib.SMTP] = queue.LifoQueue(maxsize=size)
+        self._slots = threading.BoundedSemaphore(size)
+        self._message_counts: dict[smtplib.SMTP, int] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self, timeout: float | None = None) -> Iterator[smtplib.SMTP]:
+        """Check out a connection for the duration of the ``with`` block.
+
+        The connection is returned to the pool on exit, or discarded if
+        the block raised an SMTP error.
+
+        Args:
+            timeout: Seconds to wait for a free slot (None waits forever)
+
+        Raises:
+            TimeoutError: If no connection became available in time
+        """
+        smtp = self._checkout(timeout)
+        healthy = True
+        try:
+            yield smtp
+        except (smtplib.SMTPException, OSError):
+            healthy = False
+            raise
+        finally:
+            self.release(smtp, healthy=healthy)
+
+    def _checkout(self, timeout: float | None) -> smtplib.SMTP:
+        """Reserve a slot and return an idle or freshly opened connection."""
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("Timed out waiting for an SMTP connection")
+
+        try:
+            while True:
+                try:
+                    smtp = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                if self._is_alive(smtp):
+                    return smtp
+                self._discard(smtp)
+
+            smtp = self._connect()
+            with self._lock:
+                self._message_counts[smtp] = 0
+            return smtp
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, smtp: smtplib.SMTP, healthy: bool = True) -> None:
+        """Return a checked-out connection to the pool.
+
+        Args:
+            smtp: Connection previously obtained from ``acquire``
+            healthy: False to close the connection instead of reusing it
+        """
+        try:
+            with self._lock:
+                count = self._message_counts.get(smtp, 0) + 1
+                self._message_counts[smtp] = count
+
+            if not healthy or count >= self.max_messages:
+                self._discard(smtp)
+            else:
+                self._idle.put_nowait(smtp)
+        finally:
+            self._slots.release()
+
+    def close_all(self) -> None:
+        """Close every idle connection in the pool."""
+        while True:
+            try:
+                smtp = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(smtp)
+
+    @staticmethod
+    def _is_alive(smtp: smtplib.SMTP) -> bool:
+        try:
+            status, _ = smtp.noop()
+            return status == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _discard(self, smtp: smtplib.SMTP) -> None:
+        with self._lock:
+            self._message_counts.pop(smtp, None)
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+
+
+# Singleton instance
+_smtp_pool: Optional[SMTPConnectionPool] = None
+
+
+def get_smtp_pool() -> SMTPConnectionPool:
+    """Get or create the process-wide SMTP connection pool."""
+    global _smtp_pool
+    if _smtp_pool is None:
+        settings = get_settings()
+        _smtp_pool = SMTPConnectionPool(
+            connect=lambda: open_smtp_connection(settings),
+            size=settings.smtp_pool_size,
+            max_messages=settings.smtp_pool_max_messages,
+        )
+    return _smtp_pool
@@ -18,6 +18,7 @@ from app.db.session import SessionLocal
 from app.models.user import User, UserOAuthAccount
 from app.models.integrations import CalendarIntegration, SyncedCalendarEvent
 from app.models.time_entry import TimeEntry
+from app.services.integrations.token_refresh import refresh_once
 from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
@@ -219,7 +220,10 @@ class GoogleCalendarService:
         try:
             # Refresh token if needed
             if oauth_account.expires_at and oauth_account.expires_at < datetime.now(timezone.utc):
-                if not self.refresh_access_token(oauth_account):
+                # End the read transaction so no connection is held while
+                # the provider is called
+                db.commit()
+                if not refresh_once(oauth_account, self.refresh_access_token, db):
                     return {"status": "error", "message": "Failed to refresh OAuth token"}
                 db.add(oauth_account)
                 db.commit()
@@ -16,6 +16,7 @@ from app.db.session import SessionLocal
 from app.models.user import User, UserOAuthAccount
 from app.models.integrations import CalendarIntegration, SyncedCalendarEvent
 from app.models.time_entry import TimeEntry
+from app.services.integrations.token_refresh import refresh_once
 from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
@@ -162,6 +163,8 @@ class OutlookCalendarService:
             data = response.json()
 
             oauth_account.access_token = data.get("access_token")
+            # Microsoft may rotate the refresh token on every use
+            oauth_account.refresh_token = data.get("refresh_token", oauth_account.refresh_token)
             expires_in = data.get("expires_in", 3600)
             oauth_account.expires_at = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
 
@@ -214,7 +217,10 @@ class OutlookCalendarService:
         try:
             # Refresh token if needed
             if oauth_account.expires_at and oauth_account.expires_at < datetime.now(timezone.utc):
-                if not self.refresh_access_token(oauth_account):
+                # End the read transaction so no connection is held while
+                # the provider is called
+                db.commit()
+                if not refresh_once(oauth_account, self.refresh_access_token, db):
                     return {"status": "error", "message": "Failed to refresh OAuth token"}
                 db.add(oauth_account)
                 db.commit()
@@ -5,9 +5,9 @@ import logging
 import hmac
 import hashlib
 import json
+import time
 from typing import Any
 from uuid import UUID
-from datetime import datetime, timezone
 
 import httpx
 from slack_sdk import WebClient
@@ -18,10 +18,21 @@ from app.db.session import SessionLocal
 from app.models.integrations import SlackIntegration, SlackUserBinding
 from app.models.user import User
 from app.models.time_entry import TimeEntry
+from app.utils.money import fmt_cents
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
 
+# Static notification titles and message templates
+_TITLE_TIME_ENTRY = "⏱️ Time Entry Created"
+_TITLE_INVOICE_READY = "📄 Invoice Ready"
+_TITLE_DAILY_SUMMARY = "📊 Daily Time Summary"
+
+_MSG_TIME_ENTRY = "New time entry created: *{description}*\nDuration: {hours:.1f} hours\nDate: {date}"
+_MSG_INVOICE_READY = "Invoice *{number}* is ready!\nTotal: *{total}*"
+_MSG_DAILY_SUMMARY = "Daily Summary:\n• Entries: {count}\n• Total: {hours:.1f} hours"
+
 
 class SlackIntegrationService:
     """Service for Slack workspace integration and notifications."""
@@ -52,7 +63,7 @@ class SlackIntegrationService:
         # Check timestamp is not too old (5 minutes)
         try:
             ts = int(timestamp)
-            now = int(datetime.now(timezone.utc).timestamp())
+            now = int(time.time())
             if abs(now - ts) > 300:
                 return False
         except ValueError:
@@ -241,16 +252,15 @@ class SlackIntegrationService:
         Returns:
             True if notification sent successfully
         """
-        duration_hours = time_entry.duration_minutes / 60
-        message = (
-            f"New time entry created: *{time_entry.description or 'Work'}*\n"
-            f"Duration: {duration_hours:.1f} hours\n"
-            f"Date: {time_entry.started_at.strftime('%Y-%m-%d %H:%M')}"
+        message = _MSG_TIME_ENTRY.format(
+            description=time_entry.description or "Work",
+            hours=time_entry.duration_minutes / 60,
+            date=time_entry.started_at.strftime("%Y-%m-%d %H:%M"),
         )
 
         return self.send_notification(
             user_id=user.id,
-            title="⏱️ Time Entry Created",
+            title=_TITLE_TIME_ENTRY,
             message=message,
             notification_type="success",
             db=db,
@@ -274,15 +284,11 @@ class SlackIntegrationService:
         Returns:
             True if notification sent successfully
         """
-        total_dollars = total_cents / 100
-        message = (
-            f"Invoice *{invoice_number}* is ready!\n"
-            f"Total: *${total_dollars:,.2f}*"
-        )
+        message = _MSG_INVOICE_READY.format(number=invoice_number, total=fmt_cents(total_cents))
 
         return self.send_notification(
             user_id=user_id,
-            title="📄 Invoice Ready",
+            title=_TITLE_INVOICE_READY,
             message=message,
             notification_type="success",
             db=db,
@@ -306,15 +312,11 @@ class SlackIntegrationService:
         Returns:
             True if notification sent successfully
         """
-        message = (
-            f"Daily Summary:\n"
-            f"• Entries: {entry_count}\n"
-            f"• Total: {total_hours:.1f} hours"
-        )
+        message = _MSG_DAILY_SUMMARY.format(count=entry_count, hours=total_hours)
 
         return self.send_notification(
             user_id=user_id,
-            title="📊 Daily Time Summary",
+            title=_TITLE_DAILY_SUMMARY,
             message=message,
             notification_type="info",
             db=db,
@@ -384,17 +386,15 @@ class SlackIntegrationService:
             now = datetime.now(timezone.utc)
             started_at = now - timedelta(minutes=duration_minutes)
 
-            time_entry = TimeEntry(
-                user_id=binding.user_id,
-                source="slack",
-                started_at=started_at,
-                ended_at=now,
-                duration_minutes=duration_minutes,
-                description=description,
-                status="pending",
-            )
-
-            db.add(time_entry)
+            self._insert_time_entries(db, [{
+                "user_id": binding.user_id,
+                "source": "slack",
+                "started_at": started_at,
+                "ended_at": now,
+                "duration_minutes": duration_minutes,
+                "description": description,
+                "status": "pending",
+            }])
             db.commit()
 
             return {
@@ -409,6 +409,27 @@ class SlackIntegrationService:
                 "text": f"Error: {str(e)}",
             }
 
+    @staticmethod
+    def _insert_time_entries(db: Session, rows: list[dict[str, Any]]) -> list[UUID]:
+        """Insert Slack-originated time entries in a single statement.
+
+        Bypasses the ORM unit of work (autoflush, identity map) so that
+        batch ingestion costs one round-trip regardless of row count. The
+        caller is responsible for committing.
+
+        Args:
+            db: Database session
+            rows: Column mappings for each TimeEntry
+
+        Returns:
+            IDs of the inserted time entries, in input order
+        """
+        if not rows:
+            return []
+        stmt = insert(TimeEntry).returning(TimeEntry.id, sort_by_parameter_order=True)
+        result = db.execute(stmt, rows)
+        return list(result.scalars())
+
     def list_workspace_users(self) -> list[dict[str, Any]]:
         """Get list of users in Slack workspace.
 
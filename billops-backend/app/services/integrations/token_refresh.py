@@ -0,0 +1,166 @@
+"""Cross-process de-duplication of OAuth access token refreshes.
+
+Calendar syncs, token sweeps and health checks can all notice the same
+expired token at once. A short Redis lock per OAuth account lets one
+process call the provider; the others wait briefly and pick up the saved
+token, or give up if the refresh is still running.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Callable, Optional
+from uuid import uuid4
+
+import redis
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.config.settings import get_settings
+from app.models.user import UserOAuthAccount
+
+logger = logging.getLogger(__name__)
+
+# Seconds a refresh may hold the lock before another process may take over
+_LOCK_TTL = 30
+# Seconds a waiter polls for the lock holder before giving up
+_WAIT_TIMEOUT = 5
+_POLL_INTERVAL = 0.25
+
+# Delete the lock only if this process still owns it
+_RELEASE_SCRIPT = (
+    "if redis.call('get', KEYS[1]) == ARGV[1] then "
+    "return redis.call('del', KEYS[1]) end return 0"
+)
+
+
+# Singleton instance
+_redis_client: Optional[redis.Redis] = None
+
+
+def get_redis_client() -> redis.Redis:
+    """Get or create the process-wide Redis client."""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(get_settings().redis_url)
+    return _redis_client
+
+
+def refresh_once(
+    oauth_account: UserOAuthAccount,
+    refresh: Callable[[UserOAuthAccount], bool],
+    db: Session,
+) -> bool:
+    """Refresh an account's token unless another process is already doing it.
+
+    The lock holder calls ``refresh`` and commits the new token through
+    ``db`` before releasing the lock. Other callers wait up to
+    ``_WAIT_TIMEOUT`` seconds for the lock to clear and copy the saved token
+    onto ``oauth_account``; if the holder is still refreshing they return
+    False rather than refresh the same token again. If Redis is unavailable,
+    the refresh runs directly.
+
+    This blocks on the provider and the lock wait, so call it from worker
+    threads or Celery tasks, never from the event loop.
+
+    Args:
+        oauth_account: Account whose token has expired
+        refresh: Provider refresh function (e.g. ``service.refresh_access_token``)
+        db: Caller's session, used to save or read the token. It must have
+            no open transaction: commit or roll back first, so no connection
+            is held during the provider call and only the token is committed.
+
+    Returns:
+        True if ``oauth_account`` now carries a valid access token
+
+    Raises:
+        RuntimeError: If ``db`` still has a transaction open
+    """
+    if db.in_transaction():
+        raise RuntimeError("Commit or roll back the session before refreshing a token")
+
+    client = get_redis_client()
+    key = f"oauth_refresh:{oauth_account.id}"
+    owner = uuid4().hex
+
+    try:
+        acquired = client.set(key, owner, nx=True, ex=_LOCK_TTL)
+    except redis.RedisError as e:
+        logger.warning(f"Token refresh lock unavailable, refreshing directly: {e}")
+        return refresh(oauth_account)
+
+    if acquired:
+        try:
+            if not refresh(oauth_account):
+                return False
+            _save_token(db, oauth_account)
+            return True
+        finally:
+            try:
+                client.eval(_RELEASE_SCRIPT, 1, key, owner)
+            except redis.RedisError as e:
+                logger.warning(f"Failed to release token refresh lock {key}: {e}")
+
+    if not _wait_for_release(client, key):
+        logger.warning(f"Token refresh for account {oauth_account.id} still in progress elsewhere")
+        return False
+
+    if _load_saved_token(db, oauth_account):
+        return True
+
+    logger.warning(f"No refreshed token saved for account {oauth_account.id}, refreshing directly")
+    return refresh(oauth_account)
+
+
+def _save_token(db: Session, oauth_account: UserOAuthAccount) -> None:
+    """Commit the refreshed token so waiting processes can read it."""
+    db.execute(
+        update(UserOAuthAccount)
+        .where(UserOAuthAccount.id == oauth_account.id)
+        .values(
+            access_token=oauth_account.access_token,
+            refresh_token=oauth_account.refresh_token,
+            expires_at=oauth_account.expires_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def _wait_for_release(client: redis.Redis, key: str) -> bool:
+    """Wait up to ``_WAIT_TIMEOUT`` seconds for the lock holder to finish.
+
+    Returns:
+        True if the lock cleared (or Redis went away), False on timeout
+    """
+    deadline = time.monotonic() + _WAIT_TIMEOUT
+    try:
+        while client.exists(key):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(_POLL_INTERVAL)
+    except redis.RedisError as e:
+        logger.warning(f"Lost Redis while waiting for token refresh {key}: {e}")
+    return True
+
+
+def _load_saved_token(db: Session, oauth_account: UserOAuthAccount) -> bool:
+    """Copy the token saved by the lock holder onto ``oauth_account``."""
+    row = db.execute(
+        select(
+            UserOAuthAccount.access_token,
+            UserOAuthAccount.refresh_token,
+            UserOAuthAccount.expires_at,
+        )
+        .where(UserOAuthAccount.id == oauth_account.id)
+    ).one_or_none()
+    db.commit()
+
+    if row is None or row.expires_at is None or row.expires_at <= datetime.now(timezone.utc):
+        return False
+
+    oauth_account.access_token = row.access_token
+    oauth_account.refresh_token = row.refresh_token
+    oauth_account.expires_at = row.expires_at
+    return True
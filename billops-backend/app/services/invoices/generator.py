@@ -5,10 +5,10 @@ Supports multiple template layouts: minimalist, professional, and branded.
 """
 from __future__ import annotations
 
-from typing import Any, Literal
+from typing import IO, Any, Literal, NamedTuple
 from datetime import datetime
 
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
 
 try:
     from weasyprint import HTML, CSS  # type: ignore
@@ -16,6 +16,11 @@ except Exception:  # pragma: no cover
     HTML = None  # type: ignore
     CSS = None  # type: ignore
 
+try:
+    from weasyprint.text.fonts import FontConfiguration  # type: ignore
+except Exception:  # pragma: no cover
+    FontConfiguration = None  # type: ignore
+
 # Template layout options
 TEMPLATE_LAYOUTS = {
     "minimalist": "invoice_minimalist.html",
@@ -26,15 +31,60 @@ TEMPLATE_LAYOUTS = {
 DEFAULT_LAYOUT = "professional"
 
 
+def _cents_to_currency(cents: int | None, currency: str = "USD") -> str:
+    """Jinja filter: format integer cents as e.g. 'USD $1,234.50'."""
+    return currency + " $" + format((cents or 0) / 100, ",.2f")
+
+
+def _format_date(value: Any) -> str:
+    """Jinja filter: format datetimes as e.g. 'Jan 05, 2024'."""
+    return value.strftime("%b %d, %Y") if isinstance(value, datetime) else str(value)
+
+
 def _get_jinja_env() -> Environment:
     """Create a Jinja2 environment for invoice templates."""
     loader = FileSystemLoader("app/services/invoices/templates")
     env = Environment(loader=loader, autoescape=select_autoescape(["html"]))
-    env.filters["cents_to_currency"] = lambda c, cur="USD": f"{cur} ${(c or 0)/100:,.2f}"
-    env.filters["format_date"] = lambda d: d.strftime("%b %d, %Y") if isinstance(d, datetime) else str(d)
+    env.filters["cents_to_currency"] = _cents_to_currency
+    env.filters["format_date"] = _format_date
     return env
 
 
+_templates: dict[str, Template] | None = None
+
+
+def _get_templates() -> dict[str, Template]:
+    """Load and cache one compiled Template per layout on first use."""
+    global _templates
+    if _templates is None:
+        env = _get_jinja_env()
+        _templates = {
+            layout: env.get_template(name) for layout, name in TEMPLATE_LAYOUTS.items()
+        }
+    return _templates
+
+
+_font_config: Any | None = None
+
+
+def _get_font_config() -> Any | None:
+    """Return the process-wide WeasyPrint font configuration.
+
+    Font discovery and @font-face resolution are cached inside the
+    configuration object, so sharing one avoids repeating them per PDF.
+    """
+    global _font_config
+    if _font_config is None and FontConfiguration is not None:
+        _font_config = FontConfiguration()
+    return _font_config
+
+
+def warm_up() -> None:
+    """Compile templates and load fonts ahead of the first invoice."""
+    _get_templates()
+    _get_font_config()
+
+
 def render_invoice_html(context: dict[str, Any], layout: str = DEFAULT_LAYOUT) -> str:
     """Render invoice HTML from Jinja2 template using provided context.
     
@@ -46,31 +96,46 @@ def render_invoice_html(context: dict[str, Any], layout: str = DEFAULT_LAYOUT) -
     Returns:
         Rendered HTML string.
     """
-    env = _get_jinja_env()
-    template_name = TEMPLATE_LAYOUTS.get(layout, TEMPLATE_LAYOUTS[DEFAULT_LAYOUT])
-    template = env.get_template(template_name)
+    templates = _get_templates()
+    template = templates.get(layout) or templates[DEFAULT_LAYOUT]
     return template.render(**context)
 
 
-def generate_pdf_from_html(html: str) -> bytes:
+def generate_pdf_from_html(html: str, target: IO[bytes] | None = None) -> bytes | None:
     """Generate PDF bytes from HTML string using WeasyPrint.
 
     Args:
         html: HTML content string.
+        target: Optional binary file-like object to write the PDF into.
+                When given, the document is written directly to it and no
+                intermediate bytes object is allocated.
 
     Returns:
-        PDF file bytes.
+        PDF file bytes, or None when the PDF was written to ``target``.
 
     Raises:
         RuntimeError: If WeasyPrint is not installed or available.
     """
     if HTML is None:
         raise RuntimeError("WeasyPrint is not installed or not available in this environment")
-    pdf = HTML(string=html).write_pdf()
+    font_config = _get_font_config()
+    if target is not None:
+        HTML(string=html).write_pdf(target=target, font_config=font_config)
+        return None
+    pdf = HTML(string=html).write_pdf(font_config=font_config)
     return pdf
 
 
 
+class _LineItemView(NamedTuple):
+    """Read-only line item row exposed to invoice templates."""
+
+    description: str
+    quantity: Any
+    unit_price_cents: int
+    amount_cents: int
+
+
 def build_invoice_context(
     invoice: Any,
     client: Any,
@@ -102,12 +167,12 @@ def build_invoice_context(
 
     # Basic line-item mapping for template
     items = [
-        {
-            "description": getattr(li, "description", ""),
-            "quantity": getattr(li, "quantity", "1"),
-            "unit_price_cents": getattr(li, "unit_price_cents", 0),
-            "amount_cents": getattr(li, "amount_cents", 0),
-        }
+        _LineItemView(
+            getattr(li, "description", ""),
+            getattr(li, "quantity", "1"),
+            getattr(li, "unit_price_cents", 0),
+            getattr(li, "amount_cents", 0),
+        )
         for li in line_items
     ]
 
@@ -140,7 +205,8 @@ def generate_invoice_pdf(
     line_items: list[Any],
     company: dict[str, Any] | None = None,
     layout: str = DEFAULT_LAYOUT,
-) -> bytes:
+    out: IO[bytes] | None = None,
+) -> bytes | None:
     """Render invoice HTML and return PDF bytes.
     
     Args:
@@ -151,10 +217,11 @@ def generate_invoice_pdf(
         company: Company information dictionary (optional).
         layout: Template layout ('minimalist', 'professional', or 'branded').
                 Defaults to 'professional'.
+        out: Optional binary file-like object to write the PDF into.
     
     Returns:
-        PDF file bytes.
+        PDF file bytes, or None when the PDF was written to ``out``.
     """
     ctx = build_invoice_context(invoice, client, project, line_items, company)
     html = render_invoice_html(ctx, layout=layout)
-    return generate_pdf_from_html(html)
+    return generate_pdf_from_html(html, target=out)
@@ -1,21 +1,69 @@
 """Email notification service integration."""
 import logging
+import string
+from functools import cached_property, lru_cache
 from typing import Any
-from datetime import datetime
+from datetime import date, datetime
 
 from app.services.email import EmailService
+from app.services.email_pool import get_smtp_pool
 from app.config.settings import get_settings
+from app.utils.money import fmt_cents
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=256)
+def _fmt_date(d: date) -> str:
+    """Format a date for email bodies, e.g. "January 05, 2026"."""
+    return d.strftime("%B %d, %Y")
+
+
 class EmailNotificationService:
     """Service for sending email notifications."""
 
+    # Message bodies parsed once; each send only substitutes the values.
+    _PAYMENT_TPL = string.Template(
+        "Dear $name,\n\n"
+        "Thank you for your payment of $amount on $date toward Invoice $invoice.\n\n"
+        "Your payment has been recorded.\n\n"
+        "Best regards,\nBillOps"
+    )
+    _OVERDUE_TPL = string.Template(
+        "Dear $name,\n\n"
+        "Invoice $invoice for $amount is now $days days overdue.\n\n"
+        "Please submit payment at your earliest convenience.\n\n"
+        "Best regards,\nBillOps"
+    )
+    _TIME_REMINDER_TPL = string.Template(
+        "Dear $name,\n\n"
+        "Daily reminder: You have logged $count time entries "
+        "totaling $hours hours today.\n\n"
+        "Best regards,\nBillOps"
+    )
+
     def __init__(self):
-        self.email_service = EmailService()
         self.settings = get_settings()
 
+    @cached_property
+    def email_service(self) -> EmailService:
+        """Email service, created on first use."""
+        pool = None
+        if self.settings.email_provider.lower() == "smtp" and self.settings.smtp_pool_size > 0:
+            pool = get_smtp_pool()
+        return EmailService(pool=pool)
+
+    def close(self) -> None:
+        """Release the underlying email connection (SMTP only)."""
+        if "email_service" in self.__dict__:
+            self.email_service.close()
+
+    def __enter__(self) -> "EmailNotificationService":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
     def send_invoice_notification(
         self,
         recipient_email: str,
@@ -44,7 +92,7 @@ class EmailNotificationService:
             invoice_total = invoice_total_cents / 100
             due_date_str = None
             if due_date:
-                due_date_str = due_date.strftime("%B %d, %Y")
+                due_date_str = _fmt_date(due_date.date())
 
             return self.email_service.send_invoice_email(
                 to_email=recipient_email,
@@ -80,17 +128,15 @@ class EmailNotificationService:
             True if sent successfully
         """
         try:
-            payment_amount = payment_amount_cents / 100
             payment_date_str = (
-                payment_date.strftime("%B %d, %Y") if payment_date else "today"
+                _fmt_date(payment_date.date()) if payment_date else "today"
             )
 
-            message = (
-                f"Dear {recipient_name},\n\n"
-                f"Thank you for your payment of ${payment_amount:,.2f} on {payment_date_str} "
-                f"toward Invoice {invoice_number}.\n\n"
-                f"Your payment has been recorded.\n\n"
-                f"Best regards,\nBillOps"
+            message = self._PAYMENT_TPL.substitute(
+                name=recipient_name,
+                amount=fmt_cents(payment_amount_cents),
+                date=payment_date_str,
+                invoice=invoice_number,
             )
 
             return self.email_service.send_alert_email(
@@ -124,12 +170,11 @@ class EmailNotificationService:
             True if sent successfully
         """
         try:
-            invoice_total = invoice_total_cents / 100
-            message = (
-                f"Dear {recipient_name},\n\n"
-                f"Invoice {invoice_number} for ${invoice_total:,.2f} is now {days_overdue} days overdue.\n\n"
-                f"Please submit payment at your earliest convenience.\n\n"
-                f"Best regards,\nBillOps"
+            message = self._OVERDUE_TPL.substitute(
+                name=recipient_name,
+                invoice=invoice_number,
+                amount=fmt_cents(invoice_total_cents),
+                days=days_overdue,
             )
 
             return self.email_service.send_alert_email(
@@ -161,11 +206,10 @@ class EmailNotificationService:
             True if sent successfully
         """
         try:
-            message = (
-                f"Dear {recipient_name},\n\n"
-                f"Daily reminder: You have logged {entry_count} time entries "
-                f"totaling {total_hours:.1f} hours today.\n\n"
-                f"Best regards,\nBillOps"
+            message = self._TIME_REMINDER_TPL.substitute(
+                name=recipient_name,
+                count=entry_count,
+                hours=f"{total_hours:.1f}",
             )
 
             return self.email_service.send_alert_email(
@@ -178,3 +222,8 @@ class EmailNotificationService:
             logger.error(f"Failed to send time entry reminder: {e}", exc_info=True)
             return False
 
+
+@lru_cache(maxsize=1)
+def get_email_notification_service() -> EmailNotificationService:
+    """Get the shared email notification service."""
+    return EmailNotificationService()
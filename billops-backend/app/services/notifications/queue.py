@@ -0,0 +1,274 @@
+"""Background delivery queue for best-effort notifications.
+
+Request handlers submit sends here and return immediately; a single worker
+thread drains the queue in batches, retries failures with exponential
+backoff and holds sends for a destination while its circuit breaker is open.
+"""
+import heapq
+import itertools
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker for a single destination.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    rejects calls for ``reset_timeout`` seconds. The first call after that
+    is let through as a probe (half-open) and later calls are rejected
+    until its outcome closes or re-opens the breaker.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        """Return True if a call may be attempted now."""
+        with self._lock:
+            state = self.state
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def retry_in(self) -> float:
+        """Return seconds until the breaker lets a probe through (0 if not open)."""
+        with self._lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+@dataclass
+class _Job:
+    destination: str
+    send: Callable[..., Any]
+    args: tuple = ()
+    kwargs: dict = field(default_factory=dict)
+    attempt: int = 0
+
+
+class NotificationQueue:
+    """In-process queue that delivers notification sends off the request path.
+
+    A send callable counts as failed when it raises or returns ``False``
+    (the notification services report failures by returning ``False``).
+    Only those failures count against ``max_retries``; sends rejected by an
+    open breaker are held until it lets a probe through.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 50,
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ):
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._queue: queue.Queue[Optional[_Job]] = queue.Queue()
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._breakers_lock = threading.Lock()
+        # Retries waiting for their backoff to elapse: (due, seq, job).
+        # Only touched by the worker thread.
+        self._delayed: list[tuple[float, int, _Job]] = []
+        self._seq = itertools.count()
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._worker: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, destination: str, send: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        """Queue a send for background delivery.
+
+        Args:
+            destination: Breaker key, e.g. "slack" or "email"
+            send: Callable performing the send
+            *args: Positional arguments for ``send``
+            **kwargs: Keyword arguments for ``send``
+        """
+        self._ensure_worker()
+        with self._idle:
+            self._pending += 1
+        self._queue.put(_Job(destination, send, args, kwargs))
+
+    def breaker(self, destination: str) -> CircuitBreaker:
+        """Get (or create) the circuit breaker for a destination."""
+        with self._breakers_lock:
+            breaker = self._breakers.get(destination)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self._breakers[destination] = breaker
+            return breaker
+
+    def join(self, timeout: float | None = None) -> bool:
+        """Wait until every submitted send has completed or been dropped.
+
+        Args:
+            timeout: Seconds to wait (None waits forever)
+
+        Returns:
+            True if the queue drained before the timeout
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def shutdown(self, timeout: float | None = None) -> None:
+        """Stop the worker after the sends queued so far are processed."""
+        worker = self._worker
+        if worker is None:
+            return
+        self._queue.put(None)
+        worker.join(timeout)
+        self._worker = None
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="notification-queue", daemon=True
+                )
+                self._worker.start()
+
+    def _run(self) -> None:
+        stopping = False
+        while True:
+            batch, stop = self._next_batch()
+            stopping = stopping or stop
+            for job in batch:
+                self._deliver(job)
+            if stopping and not self._delayed and self._queue.empty():
+                return
+
+    def _next_batch(self) -> tuple[list[_Job], bool]:
+        """Collect due retries plus up to ``batch_size`` queued jobs."""
+        now = time.monotonic()
+        batch: list[_Job] = []
+        while self._delayed and self._delayed[0][0] <= now:
+            batch.append(heapq.heappop(self._delayed)[2])
+
+        timeout = None
+        if batch:
+            timeout = 0
+        elif self._delayed:
+            timeout = max(0.0, self._delayed[0][0] - now)
+
+        stop = False
+        try:
+            job = self._queue.get(timeout=timeout) if timeout != 0 else self._queue.get_nowait()
+        except queue.Empty:
+            return batch, stop
+
+        while True:
+            if job is None:
+                stop = True
+            else:
+                batch.append(job)
+            if stop or len(batch) >= self.batch_size:
+                break
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+        return batch, stop
+
+    def _deliver(self, job: _Job) -> None:
+        breaker = self.breaker(job.destination)
+        if not breaker.allow():
+            # Not an attempt: wait for the breaker to reopen (or for the
+            # in-flight probe to report) without spending a retry
+            self._defer(job, breaker.retry_in() or self.base_delay)
+            return
+
+        try:
+            ok = job.send(*job.args, **job.kwargs) is not False
+        except Exception as e:
+            logger.warning(f"Notification send to {job.destination} raised: {e}")
+            ok = False
+
+        if ok:
+            breaker.record_success()
+            self._done()
+        else:
+            breaker.record_failure()
+            self._retry_or_drop(job, "send failed")
+
+    def _retry_or_drop(self, job: _Job, reason: str) -> None:
+        if job.attempt >= self.max_retries:
+            logger.error(
+                f"Dropping {job.destination} notification after "
+                f"{job.attempt + 1} attempts: {reason}"
+            )
+            self._done()
+            return
+
+        delay = min(self.base_delay * (2 ** job.attempt), self.max_delay)
+        job.attempt += 1
+        self._defer(job, delay)
+
+    def _defer(self, job: _Job, delay: float) -> None:
+        heapq.heappush(self._delayed, (time.monotonic() + delay, next(self._seq), job))
+
+    def _done(self) -> None:
+        with self._idle:
+            self._pending -= 1
+            if self._pending == 0:
+                self._idle.notify_all()
+
+
+# Singleton instance
+_notification_queue: Optional[NotificationQueue] = None
+
+
+def get_notification_queue() -> NotificationQueue:
+    """Get or create the process-wide notification queue."""
+    global _notification_queue
+    if _notification_queue is None:
+        _notification_queue = NotificationQueue()
+    return _notification_queue
@@ -1,10 +1,13 @@
 """Slack notification service integration."""
 import logging
+import ssl
+from functools import lru_cache
 from typing import Any
 from datetime import datetime, timezone
 
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
+from slack_sdk.http_retry.builtin_handlers import RateLimitErrorRetryHandler
 
 from app.config.settings import get_settings
 from app.services.slack_message_formatter import (
@@ -20,13 +23,31 @@ from app.services.slack_message_formatter import (
 logger = logging.getLogger(__name__)
 
 
+# One SSL context shared by every client so TLS setup is not repeated per token
+_SSL_CONTEXT = ssl.create_default_context()
+
+
+@lru_cache(maxsize=32)
+def _get_web_client(token: str) -> WebClient:
+    """Return a shared WebClient per bot token.
+
+    WebClient construction builds a fresh SSL context, so clients are
+    reused across service instances instead of rebuilt per notification.
+    """
+    return WebClient(
+        token=token,
+        ssl=_SSL_CONTEXT,
+        timeout=30,
+        retry_handlers=[RateLimitErrorRetryHandler(max_retry_count=2)],
+    )
+
+
 class SlackNotificationService:
     """Service for sending Slack notifications with rich formatting."""
 
     def __init__(self, bot_token: str | None = None):
-        self.settings = get_settings()
-        self.bot_token = bot_token or self.settings.slack_bot_token
-        self.client = WebClient(token=self.bot_token) if self.bot_token else None
+        self.bot_token = bot_token or get_settings().slack_bot_token
+        self.client = _get_web_client(self.bot_token) if self.bot_token else None
 
     def send_message(
         self,
@@ -298,3 +319,8 @@ class SlackNotificationService:
             logger.error(f"Failed to send invoice details: {e}")
             return False
 
+
+@lru_cache(maxsize=1)
+def get_slack_notification_service() -> SlackNotificationService:
+    """Get the shared Slack notification service for the default bot token."""
+    return SlackNotificationService()
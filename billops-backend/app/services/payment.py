@@ -1,11 +1,36 @@
 """CRUD service for Payment model."""
 from uuid import UUID
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import bindparam, delete, func, select, update
 
 from app.models.payment import Payment
 from app.schemas.payment import PaymentCreate, PaymentUpdate
 
+# Read statements built once at import; values are supplied as bound
+# parameters so every call hits the engine's compiled statement cache.
+_PAYMENTS_BY_INVOICE = (
+    select(Payment)
+    .where(Payment.invoice_id == bindparam("invoice_id"))
+    .order_by(Payment.received_at.desc())
+    .offset(bindparam("skip"))
+    .limit(bindparam("limit"))
+)
+_ALL_PAYMENTS = (
+    select(Payment)
+    .order_by(Payment.received_at.desc())
+    .offset(bindparam("skip"))
+    .limit(bindparam("limit"))
+)
+_COUNT_BY_INVOICE = select(func.count(Payment.id)).where(
+    Payment.invoice_id == bindparam("invoice_id")
+)
+_TOTAL_BY_INVOICE = select(func.sum(Payment.amount_cents)).where(
+    Payment.invoice_id == bindparam("invoice_id")
+)
+_TOTAL_BY_METHOD = select(func.sum(Payment.amount_cents)).where(
+    Payment.method == bindparam("method")
+)
+
 
 class PaymentService:
     """Service for Payment CRUD operations."""
@@ -30,20 +55,20 @@ class PaymentService:
 
     @staticmethod
     def get_by_id(db: Session, payment_id: UUID) -> Payment | None:
-        """Get a payment by ID."""
-        return db.query(Payment).filter(Payment.id == payment_id).first()
+        """Get a payment by ID, using the session identity map when loaded."""
+        return db.get(Payment, payment_id)
 
     @staticmethod
     def get_by_invoice(db: Session, invoice_id: UUID, skip: int = 0, limit: int = 50) -> list[Payment]:
         """Get all payments for an invoice."""
-        return db.query(Payment).filter(
-            Payment.invoice_id == invoice_id
-        ).offset(skip).limit(limit).order_by(Payment.received_at.desc()).all()
+        params = {"invoice_id": invoice_id, "skip": skip, "limit": limit}
+        return list(db.execute(_PAYMENTS_BY_INVOICE, params).scalars().all())
 
     @staticmethod
     def get_all(db: Session, skip: int = 0, limit: int = 50) -> list[Payment]:
         """Get all payments with pagination."""
-        return db.query(Payment).offset(skip).limit(limit).order_by(Payment.received_at.desc()).all()
+        params = {"skip": skip, "limit": limit}
+        return list(db.execute(_ALL_PAYMENTS, params).scalars().all())
 
     @staticmethod
     def update(db: Session, payment_id: UUID, payment_data: PaymentUpdate) -> Payment | None:
@@ -58,16 +83,18 @@ class PaymentService:
         Returns:
             The updated payment, or None if not found.
         """
-        db_payment = PaymentService.get_by_id(db, payment_id)
-        if not db_payment:
-            return None
-
         update_data = payment_data.model_dump(exclude_unset=True)
-        for key, value in update_data.items():
-            setattr(db_payment, key, value)
+        if not update_data:
+            return PaymentService.get_by_id(db, payment_id)
 
+        stmt = (
+            update(Payment)
+            .where(Payment.id == payment_id)
+            .values(**update_data)
+            .returning(Payment)
+        )
+        db_payment = db.execute(stmt).scalar_one_or_none()
         db.commit()
-        db.refresh(db_payment)
         return db_payment
 
     @staticmethod
@@ -82,31 +109,23 @@ class PaymentService:
         Returns:
             True if deleted, False if not found.
         """
-        db_payment = PaymentService.get_by_id(db, payment_id)
-        if not db_payment:
-            return False
-
-        db.delete(db_payment)
+        result = db.execute(delete(Payment).where(Payment.id == payment_id))
         db.commit()
-        return True
+        return result.rowcount > 0
 
     @staticmethod
     def count_by_invoice(db: Session, invoice_id: UUID) -> int:
         """Get number of payments for an invoice."""
-        return db.query(Payment).filter(Payment.invoice_id == invoice_id).count()
+        return db.scalar(_COUNT_BY_INVOICE, {"invoice_id": invoice_id})
 
     @staticmethod
     def total_amount_by_invoice(db: Session, invoice_id: UUID) -> int:
         """Get total amount paid (in cents) against an invoice."""
-        result = db.query(func.sum(Payment.amount_cents)).filter(
-            Payment.invoice_id == invoice_id,
-        ).scalar()
+        result = db.scalar(_TOTAL_BY_INVOICE, {"invoice_id": invoice_id})
         return result or 0
 
     @staticmethod
     def total_amount_by_method(db: Session, method: str) -> int:
         """Get total amount (in cents) paid using a specific method."""
-        result = db.query(func.sum(Payment.amount_cents)).filter(
-            Payment.method == method,
-        ).scalar()
+        result = db.scalar(_TOTAL_BY_METHOD, {"method": method})
         return result or 0
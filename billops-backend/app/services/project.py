@@ -1,5 +1,6 @@
 """CRUD service for Project model."""
 from uuid import UUID
+from sqlalchemy import delete, func, select, update
 from sqlalchemy.orm import Session
 
 from app.models.project import Project
@@ -33,20 +34,20 @@ class ProjectService:
 
     @staticmethod
     def get_by_id(db: Session, project_id: UUID) -> Project | None:
-        """Get a project by ID."""
-        return db.query(Project).filter(Project.id == project_id).first()
+        """Get a project by ID, using the session identity map when loaded."""
+        return db.get(Project, project_id)
 
     @staticmethod
     def get_by_client(db: Session, client_id: UUID, skip: int = 0, limit: int = 50) -> list[Project]:
         """Get all projects for a client."""
-        return db.query(Project).filter(
-            Project.client_id == client_id
-        ).offset(skip).limit(limit).all()
+        stmt = select(Project).where(Project.client_id == client_id).offset(skip).limit(limit)
+        return list(db.execute(stmt).scalars().all())
 
     @staticmethod
     def get_all(db: Session, skip: int = 0, limit: int = 50) -> list[Project]:
         """Get all projects with pagination."""
-        return db.query(Project).offset(skip).limit(limit).all()
+        stmt = select(Project).offset(skip).limit(limit)
+        return list(db.execute(stmt).scalars().all())
 
     @staticmethod
     def update(db: Session, project_id: UUID, project_data: ProjectUpdate) -> Project | None:
@@ -61,16 +62,18 @@ class ProjectService:
         Returns:
             The updated project, or None if not found.
         """
-        db_project = ProjectService.get_by_id(db, project_id)
-        if not db_project:
-            return None
-
         update_data = project_data.model_dump(exclude_unset=True)
-        for key, value in update_data.items():
-            setattr(db_project, key, value)
+        if not update_data:
+            return ProjectService.get_by_id(db, project_id)
 
+        stmt = (
+            update(Project)
+            .where(Project.id == project_id)
+            .values(**update_data)
+            .returning(Project)
+        )
+        db_project = db.execute(stmt).scalar_one_or_none()
         db.commit()
-        db.refresh(db_project)
         return db_project
 
     @staticmethod
@@ -85,15 +88,13 @@ class ProjectService:
         Returns:
             True if deleted, False if not found.
         """
-        db_project = ProjectService.get_by_id(db, project_id)
-        if not db_project:
-            return False
-
-        db.delete(db_project)
+        result = db.execute(delete(Project).where(Project.id == project_id))
         db.commit()
-        return True
+        return result.rowcount > 0
 
     @staticmethod
     def count_by_client(db: Session, client_id: UUID) -> int:
         """Get number of projects for a client."""
-        return db.query(Project).filter(Project.client_id == client_id).count()
+        return db.scalar(
+            select(func.count(Project.id)).where(Project.client_id == client_id)
+        )
@@ -1,10 +1,19 @@
 """Slack message formatting utilities and builders."""
 from __future__ import annotations
 
-from typing import Any
+import json
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Union
 from datetime import datetime, timezone
 from enum import Enum
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
 
 class MessageColor(str, Enum):
     """Color codes for Slack messages."""
@@ -19,6 +28,9 @@ class MessageColor(str, Enum):
 class SlackBlockBuilder:
     """Builder for Slack Block Kit messages."""
 
+    # Button styles Slack accepts; anything else renders as the default
+    _BUTTON_STYLES = frozenset(("primary", "danger"))
+
     @staticmethod
     def header(text: str) -> dict[str, Any]:
         """Create header block.
@@ -101,6 +113,7 @@ class SlackBlockBuilder:
         text: str,
         action_id: str,
         value: str,
+        *,
         style: str = "default",
     ) -> dict[str, Any]:
         """Create button element.
@@ -125,7 +138,7 @@ class SlackBlockBuilder:
             "value": value,
         }
 
-        if style in ("primary", "danger"):
+        if style != "default" and style in SlackBlockBuilder._BUTTON_STYLES:
             button["style"] = style
 
         return button
@@ -177,13 +190,129 @@ class SlackBlockBuilder:
         }
 
 
+@dataclass(frozen=True, slots=True)
+class HeaderBlock:
+    """Header block."""
+
+    text: str
+
+    def to_dict(self) -> dict[str, Any]:
+        return SlackBlockBuilder.header(self.text)
+
+
+@dataclass(frozen=True, slots=True)
+class SectionBlock:
+    """Section block with a single text object."""
+
+    text: str
+    markdown: bool = True
+
+    def to_dict(self) -> dict[str, Any]:
+        return SlackBlockBuilder.section(self.text, self.markdown)
+
+
+@dataclass(frozen=True, slots=True)
+class DividerBlock:
+    """Divider block."""
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"type": "divider"}
+
+
+@dataclass(frozen=True, slots=True)
+class ContextBlock:
+    """Context block with prebuilt elements."""
+
+    elements: tuple[dict[str, Any], ...]
+
+    def to_dict(self) -> dict[str, Any]:
+        return SlackBlockBuilder.context(list(self.elements))
+
+
+@dataclass(frozen=True, slots=True)
+class ContextTextBlock:
+    """Context block with a single markdown text element."""
+
+    text: str
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"type": "context", "elements": [{"type": "mrkdwn", "text": self.text}]}
+
+
+@dataclass(frozen=True, slots=True)
+class FieldsBlock:
+    """Section block of (title, value) fields."""
+
+    fields: tuple[tuple[str, str], ...]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "type": "section",
+            "fields": [
+                {"type": "mrkdwn", "text": f"*{title}*\n{value}"} for title, value in self.fields
+            ],
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class ButtonElement:
+    """Button element for an actions block."""
+
+    text: str
+    action_id: str
+    value: str
+    style: str = "default"
+
+    def to_dict(self) -> dict[str, Any]:
+        return SlackBlockBuilder.button(
+            self.text, self.action_id, self.value, style=self.style
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class ActionsBlock:
+    """Actions block of buttons."""
+
+    buttons: tuple[ButtonElement, ...]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"type": "actions", "elements": [btn.to_dict() for btn in self.buttons]}
+
+
+Block = Union[
+    HeaderBlock,
+    SectionBlock,
+    DividerBlock,
+    ContextBlock,
+    ContextTextBlock,
+    FieldsBlock,
+    ActionsBlock,
+]
+
+
 class SlackMessageBuilder:
-    """Builder for complete Slack messages."""
+    """Builder for complete Slack messages.
+
+    Blocks are kept as lightweight immutable objects and only turned into
+    Block Kit dicts when the message is built.
+    """
 
     def __init__(self):
-        self.blocks: list[dict[str, Any]] = []
+        self.blocks: list[Block] = []
         self.color: str | None = None
 
+    def add_block(self, block: Block) -> SlackMessageBuilder:
+        """Add a prebuilt block as-is.
+
+        Args:
+            block: Block object (safe to share between messages)
+
+        Returns:
+            Self for chaining
+        """
+        self.blocks.append(block)
+        return self
+
     def add_header(self, text: str) -> SlackMessageBuilder:
         """Add header block.
 
@@ -193,7 +322,7 @@ class SlackMessageBuilder:
         Returns:
             Self for chaining
         """
-        self.blocks.append(SlackBlockBuilder.header(text))
+        self.blocks.append(HeaderBlock(text))
         return self
 
     def add_section(self, text: str, markdown: bool = True) -> SlackMessageBuilder:
@@ -206,7 +335,7 @@ class SlackMessageBuilder:
         Returns:
             Self for chaining
         """
-        self.blocks.append(SlackBlockBuilder.section(text, markdown))
+        self.blocks.append(SectionBlock(text, markdown))
         return self
 
     def add_divider(self) -> SlackMessageBuilder:
@@ -215,7 +344,7 @@ class SlackMessageBuilder:
         Returns:
             Self for chaining
         """
-        self.blocks.append(SlackBlockBuilder.divider())
+        self.blocks.append(_DIVIDER)
         return self
 
     def add_context(self, elements: list[dict[str, Any]]) -> SlackMessageBuilder:
@@ -227,7 +356,7 @@ class SlackMessageBuilder:
         Returns:
             Self for chaining
         """
-        self.blocks.append(SlackBlockBuilder.context(elements))
+        self.blocks.append(ContextBlock(tuple(elements)))
         return self
 
     def add_context_text(self, text: str) -> SlackMessageBuilder:
@@ -239,9 +368,7 @@ class SlackMessageBuilder:
         Returns:
             Self for chaining
         """
-        self.blocks.append(
-            SlackBlockBuilder.context([SlackBlockBuilder.context_text(text)])
-        )
+        self.blocks.append(ContextTextBlock(text))
         return self
 
     def add_fields(self, fields: list[tuple[str, str]]) -> SlackMessageBuilder:
@@ -253,8 +380,7 @@ class SlackMessageBuilder:
         Returns:
             Self for chaining
         """
-        field_objects = [SlackBlockBuilder.field(title, value) for title, value in fields]
-        self.blocks.append(SlackBlockBuilder.fields(field_objects))
+        self.blocks.append(FieldsBlock(tuple(fields)))
         return self
 
     def add_buttons(self, buttons: list[dict[str, str]]) -> SlackMessageBuilder:
@@ -266,16 +392,15 @@ class SlackMessageBuilder:
         Returns:
             Self for chaining
         """
-        button_elements = [
-            SlackBlockBuilder.button(
+        self.blocks.append(ActionsBlock(tuple(
+            ButtonElement(
                 text=btn["text"],
                 action_id=btn["action_id"],
                 value=btn["value"],
                 style=btn.get("style", "default"),
             )
             for btn in buttons
-        ]
-        self.blocks.append(SlackBlockBuilder.actions(button_elements))
+        )))
         return self
 
     def set_color(self, color: MessageColor | str) -> SlackMessageBuilder:
@@ -287,7 +412,9 @@ class SlackMessageBuilder:
         Returns:
             Self for chaining
         """
-        self.color = str(color)
+        # Store the enum's hex value; str() of a str-Enum is its member name
+        # on Python 3.11+, which Slack does not understand
+        self.color = color.value if isinstance(color, MessageColor) else color
         return self
 
     def build(self, text: str = "") -> dict[str, Any]:
@@ -299,21 +426,100 @@ class SlackMessageBuilder:
         Returns:
             Message dict for Slack API
         """
-        message = {
+        blocks = [block.to_dict() for block in self.blocks]
+        if self.color:
+            # Colored messages carry their blocks only inside the attachment;
+            # top-level blocks would be rendered (and sent) a second time.
+            return {
+                "text": text or "BillOps Notification",
+                "attachments": [{"color": self.color, "blocks": blocks}],
+            }
+
+        return {
             "text": text or "BillOps Notification",
-            "blocks": self.blocks,
+            "blocks": blocks,
         }
 
-        if self.color:
-            # Add color via attachment (used for message preview)
-            message["attachments"] = [
-                {
-                    "color": self.color,
-                    "blocks": self.blocks,
-                }
-            ]
+    def build_json(self, text: str = "") -> bytes:
+        """Build the message and serialize it to a UTF-8 JSON body.
 
-        return message
+        Uses orjson when installed, falling back to the stdlib encoder.
+
+        Args:
+            text: Fallback text
+
+        Returns:
+            JSON-encoded message for a raw Slack API or webhook POST
+        """
+        message = self.build(text)
+        if orjson is not None:
+            return orjson.dumps(message)
+        return json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# Invariant message parts, built once and shared by every message of the
+# same kind.
+
+_STATUS_EMOJI = {
+    "draft": "📝",
+    "sent": "📤",
+    "paid": "✅",
+    "partial": "⚠️",
+    "overdue": "🚨",
+}
+
+_ALERT_EMOJI = {
+    "success": "✅",
+    "warning": "⚠️",
+    "error": "🚨",
+    "info": "ℹ️",
+}
+
+_ALERT_COLOR = {
+    "success": MessageColor.SUCCESS,
+    "warning": MessageColor.WARNING,
+    "error": MessageColor.ERROR,
+    "info": MessageColor.INFO,
+}
+
+_PAYMENT_HEADER = HeaderBlock("✅ Payment Received")
+_TIME_ENTRY_HEADER = HeaderBlock("⏱️ Time Entry Logged")
+_DAILY_SUMMARY_HEADER = HeaderBlock("📊 Daily Time Summary")
+_OVERDUE_HEADER = HeaderBlock("🚨 Invoice Overdue")
+_DIVIDER = DividerBlock()
+
+# Display formats for timestamps shown in messages
+_PAY_TIME_FMT = "%B %d, %Y at %I:%M %p"
+_DATE_FMT = "%B %d, %Y"
+
+# Daily progress bars for 0..20 filled cells (8-hour workday = full bar)
+_BAR_LENGTH = 20
+_PROGRESS_BARS = tuple(
+    "█" * filled + "░" * (_BAR_LENGTH - filled) for filled in range(_BAR_LENGTH + 1)
+)
+
+
+@lru_cache(maxsize=32)
+def _invoice_status_style(status: str) -> tuple[str, MessageColor, str]:
+    """Return (emoji, color, display label) for an invoice status."""
+    emoji = _STATUS_EMOJI.get(status, "📄")
+    color = (
+        MessageColor.SUCCESS if status == "paid"
+        else MessageColor.WARNING if status in ("overdue", "partial")
+        else MessageColor.INFO
+    )
+    return emoji, color, status.title()
+
+
+@lru_cache(maxsize=16)
+def _alert_style(alert_type: str) -> tuple[str, MessageColor]:
+    """Return (emoji, color) for an alert type."""
+    return _ALERT_EMOJI.get(alert_type, "ℹ️"), _ALERT_COLOR.get(alert_type, MessageColor.INFO)
+
+
+def _money(currency: str, amount: float) -> str:
+    """Format an amount for display, e.g. "USD $1,500.00"."""
+    return f"{currency} ${amount:,.2f}"
 
 
 # Specific message formatters
@@ -337,27 +543,17 @@ def format_invoice_message(
     Returns:
         Slack message dict
     """
-    status_emoji = {
-        "draft": "📝",
-        "sent": "📤",
-        "paid": "✅",
-        "partial": "⚠️",
-        "overdue": "🚨",
-    }
-    emoji = status_emoji.get(status, "📄")
+    status = sys.intern(status)
+    emoji, color, status_label = _invoice_status_style(status)
 
     builder = SlackMessageBuilder()
     builder.add_header(f"{emoji} Invoice {invoice_number}")
     builder.add_fields([
         ("Client", client_name),
-        ("Amount", f"{currency} ${amount:,.2f}"),
-        ("Status", status.title()),
+        ("Amount", _money(currency, amount)),
+        ("Status", status_label),
     ])
-    builder.set_color(
-        MessageColor.SUCCESS if status == "paid"
-        else MessageColor.WARNING if status in ("overdue", "partial")
-        else MessageColor.INFO
-    )
+    builder.set_color(color)
 
     return builder.build(f"Invoice {invoice_number} - {client_name}")
 
@@ -380,12 +576,12 @@ def format_payment_message(
         Slack message dict
     """
     builder = SlackMessageBuilder()
-    builder.add_header("✅ Payment Received")
+    builder.add_block(_PAYMENT_HEADER)
     builder.add_fields([
         ("Invoice", invoice_number),
         ("Client", client_name),
-        ("Amount", f"{currency} ${amount:,.2f}"),
-        ("Time", datetime.now(timezone.utc).strftime("%B %d, %Y at %I:%M %p")),
+        ("Amount", _money(currency, amount)),
+        ("Time", format(datetime.now(timezone.utc), _PAY_TIME_FMT)),
     ])
     builder.set_color(MessageColor.SUCCESS)
 
@@ -420,7 +616,7 @@ def format_time_entry_message(
         fields.append(("Client", client_name))
 
     builder = SlackMessageBuilder()
-    builder.add_header("⏱️ Time Entry Logged")
+    builder.add_block(_TIME_ENTRY_HEADER)
     builder.add_fields(fields)
     builder.set_color(MessageColor.INFO)
 
@@ -443,10 +639,10 @@ def format_daily_summary_message(
         Slack message dict
     """
     if not date_str:
-        date_str = datetime.now(timezone.utc).strftime("%B %d, %Y")
+        date_str = format(datetime.now(timezone.utc), _DATE_FMT)
 
     builder = SlackMessageBuilder()
-    builder.add_header("📊 Daily Time Summary")
+    builder.add_block(_DAILY_SUMMARY_HEADER)
     builder.add_fields([
         ("Date", date_str),
         ("Entries", str(entry_count)),
@@ -454,11 +650,8 @@ def format_daily_summary_message(
     ])
 
     # Add progress bar
-    bar_length = 20
-    filled = int((total_hours / 8) * bar_length)  # Assuming 8-hour workday
-    filled = min(filled, bar_length)
-    bar = "█" * filled + "░" * (bar_length - filled)
-    builder.add_context_text(f"Daily progress: `{bar}`")
+    filled = max(0, min(int((total_hours / 8) * _BAR_LENGTH), _BAR_LENGTH))
+    builder.add_context_text(f"Daily progress: `{_PROGRESS_BARS[filled]}`")
 
     builder.set_color(MessageColor.INFO)
 
@@ -480,21 +673,8 @@ def format_alert_message(
     Returns:
         Slack message dict
     """
-    emoji_map = {
-        "success": "✅",
-        "warning": "⚠️",
-        "error": "🚨",
-        "info": "ℹ️",
-    }
-    emoji = emoji_map.get(alert_type, "ℹ️")
-
-    color_map = {
-        "success": MessageColor.SUCCESS,
-        "warning": MessageColor.WARNING,
-        "error": MessageColor.ERROR,
-        "info": MessageColor.INFO,
-    }
-    color = color_map.get(alert_type, MessageColor.INFO)
+    alert_type = sys.intern(alert_type)
+    emoji, color = _alert_style(alert_type)
 
     builder = SlackMessageBuilder()
     builder.add_header(f"{emoji} {title}")
@@ -524,15 +704,15 @@ def format_overdue_invoice_alert(
         Slack message dict
     """
     builder = SlackMessageBuilder()
-    builder.add_header("🚨 Invoice Overdue")
+    builder.add_block(_OVERDUE_HEADER)
     builder.add_fields([
         ("Invoice", invoice_number),
         ("Client", client_name),
-        ("Amount", f"{currency} ${amount:,.2f}"),
+        ("Amount", _money(currency, amount)),
         ("Overdue", f"{days_overdue} days"),
     ])
 
-    builder.add_divider()
+    builder.add_block(_DIVIDER)
     builder.add_section(
         f"*Action Required:* Please follow up with {client_name} regarding payment."
     )
@@ -571,14 +751,8 @@ def format_invoice_details_message(
     Returns:
         Slack message dict
     """
-    status_emoji = {
-        "draft": "📝",
-        "sent": "📤",
-        "paid": "✅",
-        "partial": "⚠️",
-        "overdue": "🚨",
-    }
-    emoji = status_emoji.get(status, "📄")
+    status = sys.intern(status)
+    emoji, color, _ = _invoice_status_style(status)
 
     builder = SlackMessageBuilder()
     builder.add_header(f"{emoji} Invoice {invoice_number}")
@@ -595,19 +769,15 @@ def format_invoice_details_message(
 
     builder.add_fields(fields)
 
-    builder.add_divider()
+    builder.add_block(_DIVIDER)
 
     # Add financial details
     builder.add_section(
-        f"*Subtotal:* {currency} ${subtotal:,.2f}\n"
-        f"*Tax:* {currency} ${tax:,.2f}\n"
-        f"*Total:* {currency} ${total:,.2f}",
+        f"*Subtotal:* {_money(currency, subtotal)}\n"
+        f"*Tax:* {_money(currency, tax)}\n"
+        f"*Total:* {_money(currency, total)}",
     )
 
-    builder.set_color(
-        MessageColor.SUCCESS if status == "paid"
-        else MessageColor.WARNING if status in ("overdue", "partial")
-        else MessageColor.INFO
-    )
+    builder.set_color(color)
 
     return builder.build(f"Invoice {invoice_number}")
@@ -2,14 +2,65 @@
 from __future__ import annotations
 
 import io
-from typing import Optional
+from functools import lru_cache
+from typing import IO, Optional
 from datetime import datetime
 
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import BotoCoreError, ClientError
 
 from app.config.settings import get_settings
 
+# Payloads above this size are sent as parallel multipart uploads
+_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+_MAX_CONCURRENCY = 16
+_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=_MULTIPART_THRESHOLD,
+    multipart_chunksize=_MULTIPART_THRESHOLD,
+    max_concurrency=_MAX_CONCURRENCY,
+    use_threads=True,
+)
+
+
+@lru_cache(maxsize=4)
+def _get_s3_client(
+    region: Optional[str],
+    access_key_id: Optional[str],
+    secret_access_key: Optional[str],
+):
+    """Build an S3 client once per credential set.
+
+    Creating a boto3 session and client loads the service model and
+    resolvers, which costs far more than a small PDF upload. Clients are
+    thread-safe, so one instance is shared by every upload.
+    """
+    session = boto3.session.Session(
+        aws_access_key_id=access_key_id,
+        aws_secret_access_key=secret_access_key,
+        region_name=region,
+    )
+    # One pooled connection per transfer thread (botocore defaults to 10)
+    return session.client("s3", config=Config(max_pool_connections=_MAX_CONCURRENCY))
+
+
+@lru_cache(maxsize=8)
+def _key_prefix(base_path: Optional[str]) -> str:
+    """Normalize the configured base path into an object key prefix."""
+    base_path = (base_path or "").strip("/")
+    return f"{base_path}/" if base_path else ""
+
+
+def get_s3_client():
+    """Get the shared S3 client for the configured credentials."""
+    settings = get_settings()
+    return _get_s3_client(
+        settings.aws_region or "us-east-1",
+        settings.aws_access_key_id,
+        settings.aws_secret_access_key,
+    )
+
 
 def upload_to_s3(
     data: bytes,
@@ -29,36 +80,109 @@ def upload_to_s3(
         URL string if upload succeeded, else None.
     """
     settings = get_settings()
-    bucket = getattr(settings, "s3_bucket_name", None)
-    region = getattr(settings, "aws_region", "us-east-1")
+    bucket = settings.s3_bucket_name
 
     if not bucket:
         # S3 is not configured
         return None
 
-    session = boto3.session.Session(
-        aws_access_key_id=getattr(settings, "aws_access_key_id", None),
-        aws_secret_access_key=getattr(settings, "aws_secret_access_key", None),
-        region_name=region,
-    )
-    s3 = session.client("s3")
-
-    # Normalize base path
-    base_path = getattr(settings, "s3_base_path", "").strip("/")
-    prefix = f"{base_path}/" if base_path else ""
-    object_key = f"{prefix}{key}"
+    region = settings.aws_region or "us-east-1"
+    s3 = _get_s3_client(region, settings.aws_access_key_id, settings.aws_secret_access_key)
+    object_key = f"{_key_prefix(settings.s3_base_path)}{key}"
 
     try:
-        s3.put_object(
-            Bucket=bucket,
-            Key=object_key,
-            Body=io.BytesIO(data),
-            ContentType=content_type,
-            ACL=acl,
-        )
+        if len(data) > _MULTIPART_THRESHOLD:
+            s3.upload_fileobj(
+                io.BytesIO(data),
+                bucket,
+                object_key,
+                ExtraArgs={"ContentType": content_type, "ACL": acl},
+                Config=_TRANSFER_CONFIG,
+            )
+        else:
+            s3.put_object(
+                Bucket=bucket,
+                Key=object_key,
+                Body=data,
+                ContentType=content_type,
+                ACL=acl,
+            )
     except (BotoCoreError, ClientError):
         return None
 
     # Construct URL (non-signed)
     url = f"https://{bucket}.s3.{region}.amazonaws.com/{object_key}"
     return url
+
+
+def upload_fileobj_to_s3(
+    fileobj: IO[bytes],
+    key: str,
+    content_type: str = "application/pdf",
+    acl: str = "private",
+) -> Optional[str]:
+    """Stream a file-like object to S3 and return the public URL (if configured).
+
+    The object is read in parts (multipart above the transfer threshold),
+    so the whole payload never has to be held as one bytes object.
+
+    Args:
+        fileobj: Readable binary file-like object positioned at the start.
+        key: Object key within the bucket.
+        content_type: MIME type of the object.
+        acl: Access control list (e.g., 'private', 'public-read').
+
+    Returns:
+        URL string if upload succeeded, else None.
+    """
+    settings = get_settings()
+    bucket = settings.s3_bucket_name
+
+    if not bucket:
+        # S3 is not configured
+        return None
+
+    region = settings.aws_region or "us-east-1"
+    s3 = _get_s3_client(region, settings.aws_access_key_id, settings.aws_secret_access_key)
+    object_key = f"{_key_prefix(settings.s3_base_path)}{key}"
+
+    try:
+        s3.upload_fileobj(
+            fileobj,
+            bucket,
+            object_key,
+            ExtraArgs={"ContentType": content_type, "ACL": acl},
+            Config=_TRANSFER_CONFIG,
+        )
+    except (BotoCoreError, ClientError):
+        return None
+
+    return f"https://{bucket}.s3.{region}.amazonaws.com/{object_key}"
+
+
+def delete_from_s3(key: str) -> bool:
+    """Delete an object previously uploaded under ``key``.
+
+    Args:
+        key: Object key within the bucket, as passed to the upload helpers.
+
+    Returns:
+        True if the object was deleted, else False.
+    """
+    settings = get_settings()
+    bucket = settings.s3_bucket_name
+
+    if not bucket:
+        # S3 is not configured
+        return False
+
+    s3 = _get_s3_client(
+        settings.aws_region or "us-east-1",
+        settings.aws_access_key_id,
+        settings.aws_secret_access_key,
+    )
+    try:
+        s3.delete_object(Bucket=bucket, Key=f"{_key_prefix(settings.s3_base_path)}{key}")
+    except (BotoCoreError, ClientError):
+        return False
+    return True
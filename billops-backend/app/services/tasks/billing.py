@@ -15,10 +15,15 @@ Default layout: 'professional'
 from __future__ import annotations
 
 import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypedDict
 from uuid import UUID
 from datetime import datetime, timezone
 
-from sqlalchemy.orm import Session
+from sqlalchemy import BigInteger, Integer, Numeric, String, case, cast, func, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import joinedload
 
 from app.celery_app import celery as celery_app
 from app.db.session import SessionLocal
@@ -29,24 +34,114 @@ from app.models.client import Client
 from app.models.project import Project
 from app.services.billing_rule import BillingRuleService
 from app.services.invoices.generator import generate_invoice_pdf, TEMPLATE_LAYOUTS
-from app.services.storage.s3 import upload_to_s3
+from app.services.storage.s3 import delete_from_s3, upload_fileobj_to_s3
 
 logger = logging.getLogger(__name__)
 
+# PDFs larger than this are spooled to disk instead of held in memory
+_PDF_SPOOL_MAX_BYTES = 4 * 1024 * 1024
 
-def _round_minutes(minutes: int, increment: int | None) -> int:
-    if not increment or increment <= 0:
-        return minutes
-    return ((minutes + increment - 1) // increment) * increment
+_upload_executor: ThreadPoolExecutor | None = None
 
 
-@celery_app.task(name="tasks.billing.generate_invoice", bind=True, max_retries=3)
+class InvoiceTaskResult(TypedDict, total=False):
+    """Result returned by generate_invoice_task."""
+
+    status: str
+    message: str
+    retried: bool
+    invoice_id: str
+    invoice_number: str
+    line_items: int
+    subtotal_cents: int
+    total_cents: int
+    pdf_url: str | None
+    template_layout: str
+
+
+def _get_upload_executor() -> ThreadPoolExecutor:
+    """Get the per-process executor used to overlap S3 uploads with DB work.
+
+    Created lazily so each forked Celery worker process gets its own threads.
+    """
+    global _upload_executor
+    if _upload_executor is None:
+        _upload_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="s3-upload")
+    return _upload_executor
+
+
+def _round_half_even_div(numerator, divisor: int):
+    """SQL for ``round(numerator / divisor)`` with halves rounded to even.
+
+    Matches Python's ``round()``, which line amounts have always used;
+    PostgreSQL's ``round()`` rounds halves away from zero instead.
+
+    Args:
+        numerator: Non-negative integer SQL expression
+        divisor: Positive integer divisor
+
+    Returns:
+        Integer SQL expression
+    """
+    quotient = numerator // divisor
+    remainder = numerator % divisor
+    return quotient + case(
+        (remainder * 2 > divisor, 1),
+        ((remainder * 2 == divisor) & (quotient % 2 == 1), 1),
+        else_=0,
+    )
+
+
+def _normalize_invoice_args(
+    invoice_id: UUID | str,
+    template_layout: str = "professional",
+    company_info: dict | None = None,
+) -> tuple[UUID, str, dict | None]:
+    """Parse and validate generate_invoice_task arguments.
+
+    Raises:
+        ValueError: If invoice_id is not a valid UUID
+    """
+    if not isinstance(invoice_id, UUID):
+        invoice_id = UUID(str(invoice_id))
+    if template_layout not in TEMPLATE_LAYOUTS:
+        logger.warning(f"Unknown template layout '{template_layout}', using 'professional'")
+        template_layout = "professional"
+    return invoice_id, template_layout, company_info
+
+
+class GenerateInvoiceTask(celery_app.Task):
+    """Task base that validates invoice arguments outside the task body.
+
+    Producers get a ValueError for a malformed invoice ID at enqueue time
+    instead of a worker retrying it, and the body receives a parsed UUID.
+    """
+
+    def apply_async(self, args=None, kwargs=None, **options):
+        invoice_id, template_layout, company_info = _normalize_invoice_args(
+            *(args or ()), **(kwargs or {})
+        )
+        # JSON has no UUID type; the worker parses it back in __call__
+        return super().apply_async(
+            (str(invoice_id), template_layout, company_info), None, **options
+        )
+
+    def __call__(self, *args, **kwargs):
+        return super().__call__(*_normalize_invoice_args(*args, **kwargs))
+
+
+@celery_app.task(
+    name="tasks.billing.generate_invoice",
+    base=GenerateInvoiceTask,
+    bind=True,
+    max_retries=3,
+)
 def generate_invoice_task(
     self,
-    invoice_id: str,
+    invoice_id: UUID,
     template_layout: str = "professional",
     company_info: dict | None = None,
-) -> dict:
+) -> InvoiceTaskResult:
     """Generate invoice PDF, upload to S3, and update invoice record.
 
     Assembles an invoice by:
@@ -60,7 +155,7 @@ def generate_invoice_task(
     8. Updating the invoice with PDF URL and marking time entries as billed
 
     Args:
-        invoice_id: UUID string of the invoice to generate.
+        invoice_id: UUID of the invoice to generate (parsed by GenerateInvoiceTask).
         template_layout: Invoice template layout. One of 'minimalist', 'professional', 
                         or 'branded'. Defaults to 'professional'.
         company_info: Optional dictionary with company metadata 
@@ -80,152 +175,219 @@ def generate_invoice_task(
     Raises:
         Will retry up to 3 times on failure with exponential backoff.
     """
-    db: Session = SessionLocal()
+    # Set once the PDF is in S3, so a later rollback can remove it
+    uploaded_key: str | None = None
     try:
-        # Validate template layout
-        if template_layout not in TEMPLATE_LAYOUTS:
-            logger.warning(f"Unknown template layout '{template_layout}', using 'professional'")
-            template_layout = "professional"
-
-        inv_id = UUID(invoice_id)
-        invoice: Invoice | None = db.query(Invoice).filter(Invoice.id == inv_id).first()
-        if not invoice:
-            return {"status": "error", "message": f"Invoice {invoice_id} not found"}
-
-        client: Client | None = db.query(Client).filter(Client.id == invoice.client_id).first()
-        project: Project | None = None
-        if invoice.project_id:
-            project = db.query(Project).filter(Project.id == invoice.project_id).first()
-
-        # Determine period from meta (optional)
-        period_start = None
-        period_end = None
-        if invoice.meta and isinstance(invoice.meta, dict):
-            ps = invoice.meta.get("period_start")
-            pe = invoice.meta.get("period_end")
-            try:
-                period_start = datetime.fromisoformat(ps) if ps else None
-                period_end = datetime.fromisoformat(pe) if pe else None
-            except Exception:
-                period_start = None
-                period_end = None
-
-        # Collect approved time entries
-        q = db.query(TimeEntry).filter(
-            TimeEntry.client_id == invoice.client_id,
-            TimeEntry.status == "approved",
-        )
-        if invoice.project_id:
-            q = q.filter(TimeEntry.project_id == invoice.project_id)
-        if period_start:
-            q = q.filter(TimeEntry.started_at >= period_start)
-        if period_end:
-            q = q.filter(TimeEntry.ended_at <= period_end)
-
-        entries: list[TimeEntry] = q.order_by(TimeEntry.started_at.asc()).all()
-        if not entries:
-            return {"status": "error", "message": "No approved time entries found for invoice"}
-
-        # Apply billing rules and create line items
-        rule = None
-        if project:
-            rule = BillingRuleService.get_active_for_project(db, project.id)
-
-        line_items: list[InvoiceLineItem] = []
-        subtotal_cents = 0
-
-        for te in entries:
-            # Determine rate
-            rate_cents = rule.rate_cents if rule else 0
-            increment = rule.rounding_increment_minutes if rule else 0
-
-            billable_minutes = _round_minutes(te.duration_minutes, increment)
-            qty_hours = billable_minutes / 60.0
-            amount_cents = int(round(qty_hours * (rate_cents or 0)))
-
-            li = InvoiceLineItem(
-                invoice_id=invoice.id,
-                time_entry_id=te.id,
-                description=te.description or "Work",
-                quantity=f"{qty_hours:.2f} h",
-                unit_price_cents=rate_cents or 0,
-                amount_cents=amount_cents,
-                billing_rule_snapshot={
-                    "rule_id": str(rule.id) if rule else None,
-                    "rule_type": getattr(rule, "rule_type", None),
-                    "rate_cents": rate_cents or 0,
-                    "increment_minutes": increment or 0,
-                },
+        with SessionLocal.begin() as db:
+            invoice: Invoice | None = (
+                db.query(Invoice)
+                .options(joinedload(Invoice.client), joinedload(Invoice.project))
+                .filter(Invoice.id == invoice_id)
+                .first()
             )
-            line_items.append(li)
-            subtotal_cents += amount_cents
-            db.add(li)
-
-            # Mark time entry as billed and attach rule
-            te.status = "billed"
-            if rule:
-                te.billing_rule_id = rule.id
-            db.add(te)
-
-        # Update invoice totals
-        invoice.subtotal_cents = subtotal_cents
-        invoice.tax_cents = invoice.tax_cents or 0
-        invoice.total_cents = (invoice.subtotal_cents or 0) + (invoice.tax_cents or 0)
-        invoice.updated_at = datetime.now(timezone.utc)
-        db.add(invoice)
-        db.flush()
-
-        # Generate PDF with specified layout
-        try:
-            pdf_bytes = generate_invoice_pdf(
-                invoice,
-                client,
-                project,
-                line_items,
-                company_info=company_info,
-                layout=template_layout,
+            if not invoice:
+                return {"status": "error", "message": f"Invoice {invoice_id} not found"}
+
+            client: Client | None = invoice.client
+            project: Project | None = invoice.project
+
+            # Determine period from meta (optional)
+            period_start = None
+            period_end = None
+            if invoice.meta and isinstance(invoice.meta, dict):
+                ps = invoice.meta.get("period_start")
+                pe = invoice.meta.get("period_end")
+                try:
+                    period_start = datetime.fromisoformat(ps) if ps else None
+                    period_end = datetime.fromisoformat(pe) if pe else None
+                except Exception:
+                    period_start = None
+                    period_end = None
+
+            # Apply billing rules; the rule is the same for every entry, so resolve it once
+            rule = None
+            if project:
+                rule = BillingRuleService.get_active_cached(db, project.id)
+
+            rate_cents = (rule.rate_cents if rule else 0) or 0
+            increment = (rule.rounding_increment_minutes if rule else 0) or 0
+            rule_snapshot = {
+                "rule_id": str(rule.id) if rule else None,
+                "rule_type": getattr(rule, "rule_type", None),
+                "rate_cents": rate_cents,
+                "increment_minutes": increment,
+            }
+            # Round up to the rule's increment; a step of 1 leaves minutes unchanged
+            step = increment if increment > 0 else 1
+
+            # Approved time entries for the invoice's client/project and period
+            filters = [
+                TimeEntry.client_id == invoice.client_id,
+                TimeEntry.status == "approved",
+            ]
+            if invoice.project_id:
+                filters.append(TimeEntry.project_id == invoice.project_id)
+            if period_start:
+                filters.append(TimeEntry.started_at >= period_start)
+            if period_end:
+                filters.append(TimeEntry.ended_at <= period_end)
+
+            # Price every entry inside PostgreSQL: round minutes up to the rule's
+            # increment and multiply by the rate in integer arithmetic, then
+            # divide by 60 rounding half to even. Line item ids come from
+            # gen_random_uuid(), built in since PostgreSQL 13
+            billable_minutes = (TimeEntry.duration_minutes + (step - 1)) // step * step
+            hours = cast(billable_minutes, Numeric) / 60
+            line_select = (
+                select(
+                    func.gen_random_uuid(),
+                    literal(invoice.id, InvoiceLineItem.invoice_id.type),
+                    TimeEntry.id,
+                    func.coalesce(TimeEntry.description, "Work"),
+                    func.concat(cast(func.round(hours, 2), String), " h"),
+                    literal(rate_cents, Integer),
+                    cast(_round_half_even_div(cast(billable_minutes, BigInteger) * rate_cents, 60), Integer),
+                    literal(rule_snapshot, InvoiceLineItem.billing_rule_snapshot.type),
+                )
+                .where(*filters)
+            )
+
+            # INSERT ... SELECT creates all line items without loading any entry
+            # into Python
+            db.execute(
+                insert(InvoiceLineItem)
+                .from_select(
+                    [
+                        "id",
+                        "invoice_id",
+                        "time_entry_id",
+                        "description",
+                        "quantity",
+                        "unit_price_cents",
+                        "amount_cents",
+                        "billing_rule_snapshot",
+                    ],
+                    line_select,
+                )
+            )
+
+            # RETURNING does not preserve the SELECT's ORDER BY, so read the
+            # line items back in time entry order for the PDF
+            line_items: list[InvoiceLineItem] = list(db.scalars(
+                select(InvoiceLineItem)
+                .join(TimeEntry, TimeEntry.id == InvoiceLineItem.time_entry_id)
+                .where(InvoiceLineItem.invoice_id == invoice.id)
+                .order_by(TimeEntry.started_at.asc(), InvoiceLineItem.id)
+            ))
+
+            if not line_items:
+                return {"status": "error", "message": "No approved time entries found for invoice"}
+
+            # The stored line items are the source of truth for the subtotal
+            subtotal_cents = db.scalar(
+                select(func.coalesce(func.sum(InvoiceLineItem.amount_cents), 0))
+                .where(InvoiceLineItem.invoice_id == invoice.id)
+            )
+
+            # One timestamp for every field stamped while finalizing the invoice
+            now = datetime.now(timezone.utc)
+
+            # Update invoice totals (flushed below while the PDF uploads)
+            invoice.subtotal_cents = subtotal_cents
+            invoice.tax_cents = invoice.tax_cents or 0
+            invoice.total_cents = (invoice.subtotal_cents or 0) + (invoice.tax_cents or 0)
+            invoice.updated_at = now
+            db.add(invoice)
+
+            # Generate PDF with specified layout into a spooled buffer that only
+            # spills to disk for large documents, then stream it to S3
+            with tempfile.SpooledTemporaryFile(max_size=_PDF_SPOOL_MAX_BYTES) as pdf_buf:
+                try:
+                    generate_invoice_pdf(
+                        invoice,
+                        client,
+                        project,
+                        line_items,
+                        company=company_info,
+                        layout=template_layout,
+                        out=pdf_buf,
+                    )
+                    logger.info(f"Generated PDF for invoice {invoice.invoice_number} using '{template_layout}' layout")
+                except Exception as e:
+                    logger.error(f"Failed to generate PDF for invoice {invoice.invoice_number}: {e}")
+                    raise
+
+                # Upload to S3 in the background and overlap it with the DB writes
+                pdf_buf.seek(0)
+                file_key = f"invoices/{invoice.invoice_number}.pdf"
+                upload_future = _get_upload_executor().submit(
+                    upload_fileobj_to_s3, pdf_buf, file_key, content_type="application/pdf"
+                )
+
+                try:
+                    # Mark time entries as billed and attach rule in a single UPDATE
+                    billed_values = {"status": "billed"}
+                    if rule:
+                        billed_values["billing_rule_id"] = rule.id
+                    db.execute(
+                        update(TimeEntry)
+                        .where(TimeEntry.id.in_(
+                            select(InvoiceLineItem.time_entry_id)
+                            .where(InvoiceLineItem.invoice_id == invoice.id)
+                        ))
+                        .values(**billed_values)
+                        .execution_options(synchronize_session=False)
+                    )
+                    db.flush()
+                except Exception:
+                    # The buffer must outlive a running upload, and a PDF must
+                    # not outlive the transaction that is about to roll back
+                    if not upload_future.cancel() and upload_future.result():
+                        delete_from_s3(file_key)
+                    raise
+
+                pdf_url = upload_future.result()
+                if pdf_url:
+                    uploaded_key = file_key
+
+            # Merge the new keys into invoice meta server-side and mark it sent;
+            # only the patched keys are sent instead of the whole meta document
+            meta_patch = {
+                "generated_at": now.isoformat(),
+                "template_layout": template_layout,
+            }
+            if pdf_url:
+                meta_patch["pdf_url"] = pdf_url
+                logger.info(f"PDF uploaded to S3: {pdf_url}")
+            else:
+                logger.warning(f"PDF was not uploaded to S3 (S3 may not be configured)")
+            merged_meta = func.coalesce(cast(Invoice.meta, JSONB), literal({}, JSONB)).op("||")(
+                literal(meta_patch, JSONB)
             )
-            logger.info(f"Generated PDF for invoice {invoice.invoice_number} using '{template_layout}' layout")
-        except Exception as e:
-            logger.error(f"Failed to generate PDF for invoice {invoice.invoice_number}: {e}")
-            raise
-
-        # Upload to S3
-        file_key = f"invoices/{invoice.invoice_number}.pdf"
-        pdf_url = upload_to_s3(pdf_bytes, file_key, content_type="application/pdf")
-
-        # Update invoice meta and status
-        meta = (invoice.meta or {})
-        if pdf_url:
-            meta["pdf_url"] = pdf_url
-            logger.info(f"PDF uploaded to S3: {pdf_url}")
-        else:
-            logger.warning(f"PDF was not uploaded to S3 (S3 may not be configured)")
-        meta["generated_at"] = datetime.now(timezone.utc).isoformat()
-        meta["template_layout"] = template_layout
-        invoice.meta = meta
-        invoice.status = "sent"
-        invoice.updated_at = datetime.now(timezone.utc)
-        db.add(invoice)
-
-        db.commit()
-
-        return {
-            "status": "success",
-            "invoice_id": str(invoice.id),
-            "invoice_number": invoice.invoice_number,
-            "line_items": len(line_items),
-            "subtotal_cents": subtotal_cents,
-            "total_cents": invoice.total_cents,
-            "pdf_url": pdf_url,
-            "template_layout": template_layout,
-        }
+            db.execute(
+                update(Invoice)
+                .where(Invoice.id == invoice.id)
+                .values(meta=cast(merged_meta, Invoice.meta.type), status="sent")
+                .execution_options(synchronize_session=False)
+            )
+
+            # Leaving the block commits the task's single transaction
+            return {
+                "status": "success",
+                "invoice_id": str(invoice.id),
+                "invoice_number": invoice.invoice_number,
+                "line_items": len(line_items),
+                "subtotal_cents": subtotal_cents,
+                "total_cents": invoice.total_cents,
+                "pdf_url": pdf_url,
+                "template_layout": template_layout,
+            }
 
     except Exception as e:
         logger.error(f"Error in generate_invoice_task: {e}", exc_info=True)
+        if uploaded_key:
+            delete_from_s3(uploaded_key)
         try:
             self.retry(exc=e, countdown=60 * (2 ** self.request.retries))
         except Exception:
             return {"status": "error", "message": str(e), "retried": True}
-    finally:
-        db.close()
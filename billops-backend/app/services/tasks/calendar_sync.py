@@ -1,138 +1,209 @@
 """Celery tasks for calendar synchronization."""
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from functools import lru_cache
+from uuid import UUID
+
+from celery import group
+from sqlalchemy import Interval, func, literal, or_, select, update
+from sqlalchemy.orm import Session, joinedload
 
 from app.celery_app import celery_app
+from app.config.settings import get_settings
 from app.db.session import SessionLocal
 from app.models.integrations import CalendarIntegration
 from app.models.user import UserOAuthAccount
 from app.services.integrations.google import GoogleCalendarService
 from app.services.integrations.outlook import OutlookCalendarService
+from app.services.integrations.token_refresh import refresh_once
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on calendars claimed by one sync_all_calendars run
+_SYNC_CLAIM_BATCH = 500
+
+# Upper bound on concurrent token refresh requests per task run; each
+# thread briefly needs a pooled connection, so never exceed the pool size
+_REFRESH_WORKERS = min(16, get_settings().db_pool_size)
+
+
+@lru_cache(maxsize=None)
+def _calendar_service(provider: str) -> GoogleCalendarService | OutlookCalendarService | None:
+    """Return the shared provider service; they hold only settings, so one per process."""
+    if provider == "google":
+        return GoogleCalendarService()
+    if provider == "microsoft":
+        return OutlookCalendarService()
+    return None
+
 
 @celery_app.task(name="calendar:sync_all")
 def sync_all_calendars():
-    """Sync all active calendar integrations."""
-    db = SessionLocal()
-    try:
-        # Get all active calendar integrations
-        calendars = db.query(CalendarIntegration).filter(
-            CalendarIntegration.is_active == True,
-            CalendarIntegration.sync_enabled == True,
+    """Claim due calendar integrations and fan out a sync task for each.
+
+    Each calendar is synced by its own ``sync_single_calendar`` task so the
+    provider round-trips run in parallel across the worker pool.
+    """
+    with SessionLocal.begin() as db:
+        # Atomically claim calendars that are due: rows locked by an
+        # overlapping run are skipped, and stamping last_sync_at before
+        # committing keeps the next tick from claiming them again
+        now = datetime.now(timezone.utc)
+        due = (
+            select(CalendarIntegration.id)
+            .where(
+                CalendarIntegration.is_active == True,
+                CalendarIntegration.sync_enabled == True,
+                or_(
+                    CalendarIntegration.last_sync_at.is_(None),
+                    CalendarIntegration.last_sync_at < literal(now) - func.make_interval(
+                        0, 0, 0, 0, 0, CalendarIntegration.sync_interval_minutes, type_=Interval
+                    ),
+                ),
+            )
+            .limit(_SYNC_CLAIM_BATCH)
+            .with_for_update(skip_locked=True)
+        )
+        claimed = db.scalars(
+            update(CalendarIntegration)
+            .where(CalendarIntegration.id.in_(due))
+            .values(last_sync_at=now)
+            .returning(CalendarIntegration.id)
+            .execution_options(synchronize_session=False)
         ).all()
-        
-        logger.info(f"Starting sync for {len(calendars)} calendars")
-        
-        for calendar in calendars:
-            try:
-                sync_single_calendar(calendar.id)
-            except Exception as e:
-                logger.error(f"Failed to sync calendar {calendar.id}: {e}")
-        
-        logger.info("Calendar sync completed")
-        return {"status": "success", "synced_calendars": len(calendars)}
-    finally:
-        db.close()
+    calendar_ids = [str(calendar_id) for calendar_id in claimed]
+    
+    logger.info(f"Dispatching sync for {len(calendar_ids)} calendars")
+    if not calendar_ids:
+        return {"status": "success", "queued_calendars": 0}
+    
+    result = group(sync_single_calendar.s(calendar_id) for calendar_id in calendar_ids).apply_async()
+    return {"status": "success", "queued_calendars": len(calendar_ids), "group_id": result.id}
 
 
-@celery_app.task(name="calendar:sync_single")
-def sync_single_calendar(calendar_id: str):
+@celery_app.task(name="calendar:sync_single", bind=True, max_retries=3)
+def sync_single_calendar(self, calendar_id: str):
     """Sync a single calendar."""
-    db = SessionLocal()
     try:
-        calendar = db.query(CalendarIntegration).filter(
-            CalendarIntegration.id == calendar_id,
-            CalendarIntegration.is_active == True,
-            CalendarIntegration.sync_enabled == True,
-        ).first()
-        
-        if not calendar:
-            logger.warning(f"Calendar {calendar_id} not found or not active")
-            return {"status": "error", "message": "Calendar not found"}
+        with SessionLocal() as db:
+            calendar = db.query(CalendarIntegration).options(
+                joinedload(CalendarIntegration.oauth_account)
+            ).filter(
+                CalendarIntegration.id == calendar_id,
+                CalendarIntegration.is_active == True,
+                CalendarIntegration.sync_enabled == True,
+            ).first()
         
-        # Get OAuth account
-        oauth_account = calendar.oauth_account
-        if not oauth_account:
-            logger.error(f"No OAuth account for calendar {calendar_id}")
-            return {"status": "error", "message": "No OAuth account"}
-        
-        # Check if token needs refresh
-        if oauth_account.access_token_expires_at:
-            if oauth_account.access_token_expires_at <= datetime.now(timezone.utc):
-                logger.info(f"Token expired for calendar {calendar_id}, refreshing...")
-        
-        # Sync based on provider
-        if calendar.provider == "google":
-            service = GoogleCalendarService()
-            result = service.sync_calendar_events(
-                calendar.user_id,
-                calendar,
-                oauth_account,
-                db
-            )
-        elif calendar.provider == "microsoft":
-            service = OutlookCalendarService()
-            result = service.sync_calendar_events(
-                calendar.user_id,
-                calendar,
-                oauth_account,
-                db
-            )
-        else:
-            logger.error(f"Unknown provider: {calendar.provider}")
-            return {"status": "error", "message": f"Unknown provider: {calendar.provider}"}
+            if not calendar:
+                logger.warning(f"Calendar {calendar_id} not found or not active")
+                return {"status": "error", "message": "Calendar not found"}
         
-        logger.info(f"Synced calendar {calendar_id}: {result}")
-        return result
-    except Exception as e:
-        logger.error(f"Error syncing calendar {calendar_id}: {e}", exc_info=True)
-        return {"status": "error", "message": str(e)}
-    finally:
-        db.close()
+            return _sync_calendar(calendar, db)
+    except Exception as exc:
+        logger.error(f"Error syncing calendar {calendar_id}: {exc}", exc_info=True)
+        raise self.retry(exc=exc, countdown=60 * (2 ** self.request.retries))
+
+
+def _sync_calendar(calendar: CalendarIntegration, db: Session) -> dict:
+    """Sync an already-loaded calendar integration with its provider.
+
+    Args:
+        calendar: Calendar integration with ``oauth_account`` loaded
+        db: Database session
+
+    Returns:
+        Provider sync result, or an error dict
+    """
+    calendar_id = calendar.id
+
+    # Get OAuth account
+    oauth_account = calendar.oauth_account
+    if not oauth_account:
+        logger.error(f"No OAuth account for calendar {calendar_id}")
+        return {"status": "error", "message": "No OAuth account"}
+    
+    # Check if token needs refresh
+    if oauth_account.expires_at:
+        if oauth_account.expires_at <= datetime.now(timezone.utc):
+            logger.info(f"Token expired for calendar {calendar_id}, refreshing...")
+    
+    # Sync based on provider
+    service = _calendar_service(calendar.provider)
+    if service is None:
+        logger.error(f"Unknown provider: {calendar.provider}")
+        return {"status": "error", "message": f"Unknown provider: {calendar.provider}"}
+    
+    result = service.sync_calendar_events(
+        calendar.user_id,
+        calendar,
+        oauth_account,
+        db
+    )
+    
+    logger.info(f"Synced calendar {calendar_id}: {result}")
+    return result
 
 
 @celery_app.task(name="calendar:refresh_tokens")
 def refresh_all_tokens():
-    """Refresh all expired OAuth tokens."""
-    db = SessionLocal()
-    try:
-        # Get all OAuth accounts with refresh tokens
-        oauth_accounts = db.query(UserOAuthAccount).filter(
+    """Refresh all expired OAuth tokens concurrently."""
+    with SessionLocal() as db:
+        # Expired accounts with a refresh token that back at least one calendar
+        expired = db.query(UserOAuthAccount.id, UserOAuthAccount.provider).filter(
             UserOAuthAccount.refresh_token.isnot(None),
+            UserOAuthAccount.expires_at.isnot(None),
+            UserOAuthAccount.expires_at <= datetime.now(timezone.utc),
+            UserOAuthAccount.id.in_(select(CalendarIntegration.oauth_account_id)),
         ).all()
+    
+    logger.info(f"Found {len(expired)} OAuth accounts needing token refresh")
+    if not expired:
+        return {"status": "success", "refreshed_count": 0}
+    
+    # Each refresh is one provider round-trip; overlap them on a thread pool
+    account_ids = [account_id for account_id, _ in expired]
+    providers = [provider for _, provider in expired]
+    with ThreadPoolExecutor(max_workers=min(_REFRESH_WORKERS, len(expired))) as pool:
+        refreshed_count = sum(pool.map(_refresh_account_token, account_ids, providers))
+    
+    logger.info(f"Token refresh completed: {refreshed_count} tokens refreshed")
+    return {"status": "success", "refreshed_count": refreshed_count}
+
+
+def _refresh_account_token(account_id: UUID, provider: str) -> bool:
+    """Refresh one account's access token using its own session.
+
+    Runs on a pool thread, so it must not share a Session with the caller.
+
+    Args:
+        account_id: OAuth account to refresh
+        provider: Account provider (google | microsoft)
+
+    Returns:
+        True if the token was refreshed and saved
+    """
+    try:
+        with SessionLocal() as db:
+            account = db.get(UserOAuthAccount, account_id)
+            if not account:
+                logger.warning(f"OAuth account {account_id} not found")
+                return False
         
-        logger.info(f"Checking {len(oauth_accounts)} OAuth accounts for token refresh")
+            service = _calendar_service(provider)
+            if service is None:
+                logger.error(f"Unknown provider: {provider}")
+                return False
         
-        refreshed_count = 0
-        for account in oauth_accounts:
-            try:
-                if account.access_token_expires_at:
-                    if account.access_token_expires_at <= datetime.now(timezone.utc):
-                        # Token is expired, refresh it
-                        calendars = db.query(CalendarIntegration).filter(
-                            CalendarIntegration.oauth_account_id == account.id
-                        ).all()
-                        
-                        if calendars:
-                            # Determine provider from calendar
-                            provider = calendars[0].provider
-                            
-                            if provider == "google":
-                                service = GoogleCalendarService()
-                                service.refresh_access_token(account, db)
-                                refreshed_count += 1
-                                logger.info(f"Refreshed token for user {account.user_id}")
-                            elif provider == "microsoft":
-                                service = OutlookCalendarService()
-                                service.refresh_access_token(account, db)
-                                refreshed_count += 1
-                                logger.info(f"Refreshed token for user {account.user_id}")
-            except Exception as e:
-                logger.error(f"Error refreshing token for account {account.id}: {e}")
+            # End the read transaction so the connection goes back to the
+            # pool during the provider call; refresh_once commits the new
+            # token through this session
+            db.commit()
+            if not refresh_once(account, service.refresh_access_token, db):
+                return False
         
-        logger.info(f"Token refresh completed: {refreshed_count} tokens refreshed")
-        return {"status": "success", "refreshed_count": refreshed_count}
-    finally:
-        db.close()
+            logger.info(f"Refreshed token for user {account.user_id}")
+            return True
+    except Exception as e:
+        logger.error(f"Error refreshing token for account {account_id}: {e}")
+        return False
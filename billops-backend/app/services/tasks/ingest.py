@@ -4,10 +4,15 @@ Celery task for ingesting and processing raw activity signals.
 Converts activity events from integrations into suggested time entries.
 """
 import logging
-from datetime import datetime, timezone
-from uuid import UUID
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import TypedDict
+from uuid import UUID, uuid4
 
-from sqlalchemy.orm import Session
+from celery_batches import Batches
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
 
 from app.celery_app import celery as celery_app
 from app.db.session import SessionLocal
@@ -20,139 +25,263 @@ from app.services.time_entry import TimeEntryService
 
 logger = logging.getLogger(__name__)
 
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
 
-@celery_app.task(name="tasks.ingest_events", bind=True, max_retries=3)
-def ingest_events_task(self, user_id: str, activity_signals: list[dict]) -> dict:
+# Delay before re-queueing a batch that hit a transient database error,
+# doubled on each further retry
+_TRANSIENT_RETRY_COUNTDOWN = 30
+
+# Re-queues per message before it is stored as an error instead
+_MAX_TRANSIENT_RETRIES = 3
+
+
+class IngestResult(TypedDict, total=False):
+    """Per-message result stored for ingest_events_task."""
+
+    status: str
+    message: str
+    suggested_count: int
+    created_count: int
+    created_ids: list[str]
+    verification_required: list[dict]
+
+
+@lru_cache(maxsize=1024)
+def _parse_uuid(value: str) -> UUID:
+    """Parse an ID string; suggested entries share a handful of projects/clients."""
+    return UUID(value)
+
+
+@lru_cache(maxsize=4096)
+def _parse_iso(value: str) -> datetime:
+    """Parse an ISO timestamp; integrations often repeat bucketed timestamps."""
+    return datetime.fromisoformat(value)
+
+
+def _normalize_signal(signal: dict) -> dict:
+    """Convert a signal's timestamp to a datetime in place and return it.
+
+    Signal dicts are freshly deserialized from the task message and owned
+    by this task, so they are updated rather than copied.
+    """
+    ts = signal.get("timestamp")
+    if isinstance(ts, str):
+        signal["timestamp"] = _parse_iso(ts)
+    elif isinstance(ts, (int, float)):
+        signal["timestamp"] = _EPOCH + timedelta(seconds=ts)
+    return signal
+
+
+def _unpack_request(
+    user_id: str,
+    activity_signals: list[dict],
+    retries: int = 0,
+) -> tuple[str, list[dict]]:
+    """Bind a batched request's arguments to the task's public signature.
+
+    ``retries`` is only set on messages this task re-queued itself.
     """
-    Process raw activity signals and create suggested time entries.
+    return user_id, activity_signals
+
+
+# Messages are coalesced into batches of up to 50, or whatever arrived within
+# 5 seconds. The task is routed to the "ingest" queue, whose workers need a
+# prefetch window of at least flush_every messages (worker_prefetch_multiplier
+# * concurrency, or 0) even though the default multiplier is 1.
+@celery_app.task(name="tasks.ingest_events", base=Batches, flush_every=50, flush_interval=5)
+def ingest_events_task(requests: list) -> None:
+    """
+    Process batched activity-signal messages and create suggested time entries.
+    
+    Producers still call ``ingest_events_task.delay(user_id, activity_signals)``.
+    Signals are grouped by user so each user is looked up once and the
+    heuristics see all of a user's signals in the batch together; every
+    message receives its user's processing result. Each user's entries are
+    inserted in their own savepoint, so one user's bad rows fail only that
+    user's messages. Transient database errors re-queue the whole batch,
+    up to ``_MAX_TRANSIENT_RETRIES`` times per message.
     
     Args:
-        user_id: UUID of user who generated signals
-        activity_signals: List of activity signal dicts with timestamp and metadata
-        
-    Returns:
-        Dict with processing results and created time entry IDs
+        requests: Batched task requests carrying (user_id, activity_signals)
     """
-    db = SessionLocal()
+    signals_by_user: dict[str, list[dict]] = defaultdict(list)
+    requests_by_user: dict[str, list] = defaultdict(list)
+    for request in requests:
+        user_id, activity_signals = _unpack_request(*request.args, **request.kwargs)
+        signals_by_user[user_id].extend(activity_signals)
+        requests_by_user[user_id].append(request)
+    
+    logger.info(f"Ingesting {len(requests)} signal batches for {len(signals_by_user)} users")
+    
+    results: dict[str, IngestResult] = {}
     try:
-        logger.info(f"Ingesting {len(activity_signals)} signals for user {user_id}")
-        
-        # Validate user exists
-        user = db.query(User).filter(User.id == UUID(user_id)).first()
-        if not user:
-            logger.error(f"User not found: {user_id}")
-            return {"status": "error", "message": f"User {user_id} not found"}
-        
-        # Convert timestamps to datetime objects if needed
-        processed_signals = []
-        for signal in activity_signals:
-            ts = signal.get("timestamp")
-            if isinstance(ts, str):
-                ts = datetime.fromisoformat(ts)
-            elif isinstance(ts, (int, float)):
-                ts = datetime.fromtimestamp(ts, tz=timezone.utc)
-            
-            signal_copy = signal.copy()
-            signal_copy["timestamp"] = ts
-            processed_signals.append(signal_copy)
-        
-        # Generate suggested time entries
-        suggested_entries = ActivityHeuristics.generate_time_entries(processed_signals)
-        
-        if not suggested_entries:
-            logger.info(f"No suggested time entries generated for user {user_id}")
-            return {
-                "status": "success",
-                "suggested_count": 0,
-                "created_ids": [],
-                "verification_required": [],
+        with SessionLocal.begin() as db:
+            # Validate users exist with one query for the whole batch
+            user_uuids: dict[str, UUID] = {}
+            for user_id in signals_by_user:
+                try:
+                    user_uuids[user_id] = UUID(user_id)
+                except ValueError:
+                    results[user_id] = {"status": "error", "message": f"Invalid user ID {user_id}"}
+            existing = {
+                uid for (uid,) in db.query(User.id).filter(User.id.in_(list(user_uuids.values()))).all()
             }
         
-        logger.info(f"Generated {len(suggested_entries)} suggested entries")
-        
-        # Create time entries
-        created_ids = []
-        verification_required = []
-        
-        for suggested in suggested_entries:
-            try:
-                # Find project and client from context
-                project_id = suggested.context_data.get("project_id")
-                client_id = suggested.context_data.get("client_id")
-                
-                # Skip if no project/client (will be marked for manual classification)
-                if not project_id or not client_id:
-                    verification_required.append({
-                        "reason": "missing_project_or_client",
-                        "started_at": suggested.started_at.isoformat(),
-                        "ended_at": suggested.ended_at.isoformat(),
-                    })
+            for user_id, user_uuid in user_uuids.items():
+                if user_uuid not in existing:
+                    logger.error(f"User not found: {user_id}")
+                    results[user_id] = {"status": "error", "message": f"User {user_id} not found"}
                     continue
                 
-                # Create time entry
-                entry_data = TimeEntryCreate(
-                    project_id=UUID(project_id) if isinstance(project_id, str) else project_id,
-                    client_id=UUID(client_id) if isinstance(client_id, str) else client_id,
-                    billing_rule_id=None,
-                    source="auto",  # Indicates automated ingestion
-                    started_at=suggested.started_at,
-                    ended_at=suggested.ended_at,
-                    description=suggested.description,
-                    context_data=suggested.context_data,
-                )
-                
-                # Create entry with pending status
-                db_entry = TimeEntry(
-                    **entry_data.model_dump(),
-                    user_id=UUID(user_id),
-                    status="pending",  # Requires review
-                    duration_minutes=int((suggested.ended_at - suggested.started_at).total_seconds() / 60),
+                # Insert the user's entries with one statement in a savepoint so
+                # a bad row only fails this user's messages
+                entry_rows: list[dict] = []
+                try:
+                    result = _ingest_user_signals(user_uuid, signals_by_user[user_id], entry_rows)
+                    if entry_rows:
+                        with db.begin_nested():
+                            db.execute(insert(TimeEntry), entry_rows)
+                except OperationalError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Failed to ingest signals for user {user_id}: {e}", exc_info=True)
+                    result = {"status": "error", "message": str(e)}
+                results[user_id] = result
+    
+    except OperationalError as e:
+        # Connection-level failures are transient: send every message back
+        # under its own task id instead of reporting entries that were lost.
+        # The retry count travels in the message kwargs, since Batches acks
+        # messages on flush and keeps no request.retries of its own.
+        logger.warning(f"Transient database error in ingest_events_task, re-queueing {len(requests)} messages: {e}")
+        for request in requests:
+            retries = request.kwargs.get("retries", 0)
+            if retries >= _MAX_TRANSIENT_RETRIES:
+                logger.error(f"Giving up on ingest message {request.id} after {retries} retries")
+                celery_app.backend.mark_as_done(
+                    request.id,
+                    {"status": "error", "message": f"Database unavailable: {e}"},
+                    request=request,
                 )
-                db.add(db_entry)
-                db.flush()
-                
-                created_ids.append(str(db_entry.id))
-                
-                # Mark for verification if low confidence
-                if suggested.should_verify:
-                    verification_required.append({
-                        "entry_id": str(db_entry.id),
-                        "reason": "low_confidence",
-                        "confidence": suggested.confidence,
-                    })
-                
-            except Exception as e:
-                logger.error(f"Error creating time entry: {e}", exc_info=True)
-                verification_required.append({
-                    "reason": "error_creating_entry",
-                    "error": str(e),
-                })
-        
-        db.commit()
-        
-        logger.info(f"Created {len(created_ids)} time entries, {len(verification_required)} require verification")
+                continue
+            ingest_events_task.apply_async(
+                args=request.args,
+                kwargs={**request.kwargs, "retries": retries + 1},
+                task_id=request.id,
+                countdown=_TRANSIENT_RETRY_COUNTDOWN * (2 ** retries),
+            )
+        return
+    
+    except Exception as e:
+        logger.error(f"Error in ingest_events_task: {e}", exc_info=True)
+        error: IngestResult = {"status": "error", "message": str(e)}
+        results = {user_id: error for user_id in signals_by_user}
+    
+    for user_id, user_requests in requests_by_user.items():
+        for request in user_requests:
+            celery_app.backend.mark_as_done(request.id, results[user_id], request=request)
+
+
+def _ingest_user_signals(
+    user_id: UUID,
+    activity_signals: list[dict],
+    entry_rows: list[dict],
+) -> IngestResult:
+    """
+    Turn one user's activity signals into pending time entry rows.
+    
+    Entry IDs are generated here so results can reference them before the
+    caller bulk-inserts ``entry_rows``.
+    
+    Args:
+        user_id: UUID of user who generated signals
+        activity_signals: List of activity signal dicts with timestamp and metadata
+        entry_rows: List that new time entry rows are appended to
         
+    Returns:
+        Dict with processing results and created time entry IDs
+    """
+    # Generate suggested time entries, normalizing signals as they stream in
+    suggested_entries = ActivityHeuristics.generate_time_entries(
+        _normalize_signal(signal) for signal in activity_signals
+    )
+    
+    if not suggested_entries:
+        logger.info(f"No suggested time entries generated for user {user_id}")
         return {
             "status": "success",
-            "suggested_count": len(suggested_entries),
-            "created_count": len(created_ids),
-            "created_ids": created_ids,
-            "verification_required": verification_required,
+            "suggested_count": 0,
+            "created_count": 0,
+            "created_ids": [],
+            "verification_required": [],
         }
     
-    except Exception as e:
-        logger.error(f"Error in ingest_events_task: {e}", exc_info=True)
-        
-        # Retry with exponential backoff
+    logger.info(f"Generated {len(suggested_entries)} suggested entries")
+    
+    # Create time entries
+    created_ids = []
+    verification_required = []
+    
+    for suggested in suggested_entries:
         try:
-            self.retry(exc=e, countdown=60 * (2 ** self.request.retries))
-        except Exception as retry_err:
-            logger.error(f"Task retry failed: {retry_err}")
-            return {
-                "status": "error",
-                "message": str(e),
-                "retried": True,
-            }
+            # Find project and client from context
+            project_id = suggested.context_data.get("project_id")
+            client_id = suggested.context_data.get("client_id")
+            
+            # Skip if no project/client (will be marked for manual classification)
+            if not project_id or not client_id:
+                verification_required.append({
+                    "reason": "missing_project_or_client",
+                    "started_at": suggested.started_at.isoformat(),
+                    "ended_at": suggested.ended_at.isoformat(),
+                })
+                continue
+            
+            # Create time entry
+            entry_data = TimeEntryCreate(
+                project_id=_parse_uuid(project_id) if isinstance(project_id, str) else project_id,
+                client_id=_parse_uuid(client_id) if isinstance(client_id, str) else client_id,
+                billing_rule_id=None,
+                source="auto",  # Indicates automated ingestion
+                started_at=suggested.started_at,
+                ended_at=suggested.ended_at,
+                description=suggested.description,
+                context_data=suggested.context_data,
+            )
+            
+            # Queue entry with pending status
+            entry_id = uuid4()
+            entry_rows.append({
+                **entry_data.model_dump(),
+                "id": entry_id,
+                "user_id": user_id,
+                "status": "pending",  # Requires review
+                "duration_minutes": int((suggested.ended_at - suggested.started_at).total_seconds() / 60),
+            })
+            
+            created_ids.append(str(entry_id))
+            
+            # Mark for verification if low confidence
+            if suggested.should_verify:
+                verification_required.append({
+                    "entry_id": str(entry_id),
+                    "reason": "low_confidence",
+                    "confidence": suggested.confidence,
+                })
+            
+        except Exception as e:
+            logger.error(f"Error creating time entry: {e}", exc_info=True)
+            verification_required.append({
+                "reason": "error_creating_entry",
+                "error": str(e),
+            })
+    
+    logger.info(f"Created {len(created_ids)} time entries, {len(verification_required)} require verification")
     
-    finally:
-        db.close()
+    return {
+        "status": "success",
+        "suggested_count": len(suggested_entries),
+        "created_count": len(created_ids),
+        "created_ids": created_ids,
+        "verification_required": verification_required,
+    }
@@ -1,20 +1,34 @@
 """Celery tasks for integration syncs and notifications."""
 import logging
-from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from celery import group
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session, selectinload
 
 from app.celery_app import celery_app
-from app.db.session import SessionLocal
+from app.db.session import TaskSession
+from app.models.client import Client
 from app.models.integrations import CalendarIntegration, SlackIntegration, SlackUserBinding
-from app.models.user import User
+from app.models.user import User, UserOAuthAccount
 from app.services.integrations.google import GoogleCalendarService
 from app.services.integrations.outlook import OutlookCalendarService
 from app.services.integrations.slack_service import SlackIntegrationService
+from app.services.notifications.slack import get_slack_notification_service
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on concurrent provider probes per health check run
+_HEALTH_CHECK_WORKERS = 16
+
+# Tokens valid for longer than this are counted healthy without a probe
+_TOKEN_FRESH_MARGIN = timedelta(minutes=10)
+
+# Rows fetched per page when sweeping large tables
+_SWEEP_PAGE_SIZE = 500
+
 
 @celery_app.task(bind=True, max_retries=3)
 def sync_google_calendar(self, calendar_integration_id: str) -> dict:
@@ -26,7 +40,7 @@ def sync_google_calendar(self, calendar_integration_id: str) -> dict:
     Returns:
         Dictionary with sync results
     """
-    db = SessionLocal()
+    db = TaskSession()
     try:
         calendar_id = UUID(calendar_integration_id)
         calendar = db.query(CalendarIntegration).filter(
@@ -62,8 +76,6 @@ def sync_google_calendar(self, calendar_integration_id: str) -> dict:
         logger.error(f"Error syncing Google Calendar {calendar_integration_id}: {exc}", exc_info=True)
         # Retry with exponential backoff
         raise self.retry(exc=exc, countdown=60 * (2 ** self.request.retries))
-    finally:
-        db.close()
 
 
 @celery_app.task(bind=True, max_retries=3)
@@ -76,7 +88,7 @@ def sync_outlook_calendar(self, calendar_integration_id: str) -> dict:
     Returns:
         Dictionary with sync results
     """
-    db = SessionLocal()
+    db = TaskSession()
     try:
         calendar_id = UUID(calendar_integration_id)
         calendar = db.query(CalendarIntegration).filter(
@@ -112,8 +124,6 @@ def sync_outlook_calendar(self, calendar_integration_id: str) -> dict:
         logger.error(f"Error syncing Outlook Calendar {calendar_integration_id}: {exc}", exc_info=True)
         # Retry with exponential backoff
         raise self.retry(exc=exc, countdown=60 * (2 ** self.request.retries))
-    finally:
-        db.close()
 
 
 @celery_app.task
@@ -123,40 +133,50 @@ def sync_all_calendars() -> dict:
     Returns:
         Dictionary with overall sync results
     """
-    db = SessionLocal()
+    db = TaskSession()
     try:
-        calendars = db.query(CalendarIntegration).filter(
-            CalendarIntegration.is_active == True,
-            CalendarIntegration.sync_enabled == True
-        ).all()
-        
         results = {
-            "total": len(calendars),
+            "total": 0,
             "synced": 0,
             "failed": 0,
             "skipped": 0,
-            "details": []
+            "group_ids": [],
         }
         
-        for calendar in calendars:
-            try:
-                if calendar.provider == "google":
-                    task = sync_google_calendar.delay(str(calendar.id))
-                elif calendar.provider == "microsoft":
-                    task = sync_outlook_calendar.delay(str(calendar.id))
+        # Walk calendars in id order a page at a time so memory stays bounded
+        # and the first syncs are dispatched before the whole table is read
+        last_id = None
+        while True:
+            query = db.query(CalendarIntegration.id, CalendarIntegration.provider).filter(
+                CalendarIntegration.is_active == True,
+                CalendarIntegration.sync_enabled == True
+            )
+            if last_id is not None:
+                query = query.filter(CalendarIntegration.id > last_id)
+            page = query.order_by(CalendarIntegration.id).limit(_SWEEP_PAGE_SIZE).all()
+            if not page:
+                break
+            last_id = page[-1].id
+            results["total"] += len(page)
+            
+            signatures = []
+            for calendar_id, provider in page:
+                if provider == "google":
+                    signatures.append(sync_google_calendar.s(str(calendar_id)))
+                elif provider == "microsoft":
+                    signatures.append(sync_outlook_calendar.s(str(calendar_id)))
                 else:
                     results["skipped"] += 1
-                    continue
-                
-                results["synced"] += 1
-                results["details"].append({
-                    "calendar_id": str(calendar.id),
-                    "provider": calendar.provider,
-                    "task_id": task.id
-                })
-            except Exception as e:
-                logger.error(f"Failed to schedule sync for calendar {calendar.id}: {e}")
-                results["failed"] += 1
+            
+            # Publish the page's sync messages in one group
+            if signatures:
+                try:
+                    job = group(signatures).apply_async()
+                    results["synced"] += len(signatures)
+                    results["group_ids"].append(job.id)
+                except Exception as e:
+                    logger.error(f"Failed to schedule calendar sync group: {e}")
+                    results["failed"] += len(signatures)
         
         logger.info(f"Scheduled calendar sync tasks: {results}")
         return results
@@ -164,8 +184,6 @@ def sync_all_calendars() -> dict:
     except Exception as e:
         logger.error(f"Error in sync_all_calendars: {e}", exc_info=True)
         return {"status": "error", "message": str(e)}
-    finally:
-        db.close()
 
 
 @celery_app.task
@@ -175,13 +193,16 @@ def send_slack_daily_summaries() -> dict:
     Returns:
         Dictionary with results
     """
-    db = SessionLocal()
+    db = TaskSession()
     try:
         from datetime import datetime, timezone, timedelta
         from app.models.time_entry import TimeEntry
         from sqlalchemy import func
         
-        bindings = db.query(SlackUserBinding).all()
+        # Opted-in bindings only, as plain rows
+        bindings = db.query(SlackUserBinding.user_id).filter(
+            SlackUserBinding.notify_daily_summary == True
+        ).all()
         results = {
             "total": len(bindings),
             "sent": 0,
@@ -191,28 +212,34 @@ def send_slack_daily_summaries() -> dict:
         slack_service = SlackIntegrationService()
         today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
         
+        # Today's totals for every opted-in user in one aggregate query
+        summary_user_ids = {b.user_id for b in bindings}
+        totals = {
+            user_id: (minutes, count)
+            for user_id, minutes, count in db.query(
+                TimeEntry.user_id,
+                func.sum(TimeEntry.duration_minutes),
+                func.count(TimeEntry.id),
+            ).filter(
+                TimeEntry.user_id.in_(summary_user_ids),
+                TimeEntry.started_at >= today_start
+            ).group_by(TimeEntry.user_id).all()
+        } if summary_user_ids else {}
+        
         for binding in bindings:
             try:
-                if not binding.notify_daily_summary:
-                    continue
-                
-                # Get today's time entries
-                entries = db.query(TimeEntry).filter(
-                    TimeEntry.user_id == binding.user_id,
-                    TimeEntry.started_at >= today_start
-                ).all()
-                
-                if not entries:
+                user_totals = totals.get(binding.user_id)
+                if not user_totals:
                     continue
                 
-                total_minutes = sum(e.duration_minutes for e in entries)
+                total_minutes, entry_count = user_totals
                 total_hours = total_minutes / 60
                 
                 # Send summary
                 success = slack_service.send_daily_summary(
                     binding.user_id,
                     total_hours,
-                    len(entries),
+                    entry_count,
                     db
                 )
                 
@@ -230,8 +257,6 @@ def send_slack_daily_summaries() -> dict:
     except Exception as e:
         logger.error(f"Error in send_slack_daily_summaries: {e}", exc_info=True)
         return {"status": "error", "message": str(e)}
-    finally:
-        db.close()
 
 
 @celery_app.task
@@ -244,7 +269,7 @@ def send_invoice_notifications(invoice_id: str) -> dict:
     Returns:
         Dictionary with results
     """
-    db = SessionLocal()
+    db = TaskSession()
     try:
         from app.models.invoice import Invoice
         
@@ -255,46 +280,65 @@ def send_invoice_notifications(invoice_id: str) -> dict:
             logger.error(f"Invoice {invoice_uuid} not found")
             return {"status": "error", "message": "Invoice not found"}
         
-        # Find all user bindings for the invoice creator/client
-        bindings = db.query(SlackUserBinding).filter(
-            SlackUserBinding.user_id == invoice.created_by_user_id
+        # Invoices have no creator of their own; notify the user who owns
+        # the invoiced client, if they opted in
+        bindings = db.query(SlackUserBinding.user_id).join(
+            Client, Client.created_by == SlackUserBinding.user_id
+        ).filter(
+            Client.id == invoice.client_id,
+            SlackUserBinding.notify_invoice_ready == True,
         ).all()
         
         results = {
             "total": len(bindings),
-            "sent": 0,
-            "failed": 0
+            "queued": 0,
+            "group_id": None,
         }
         
-        slack_service = SlackIntegrationService()
-        for binding in bindings:
-            try:
-                if not binding.notify_invoice_ready:
-                    continue
-                
-                success = slack_service.notify_invoice_ready(
-                    invoice.invoice_number or str(invoice.id),
-                    invoice.total_amount_cents,
-                    binding.user_id,
-                    db
-                )
-                
-                if success:
-                    results["sent"] += 1
-                else:
-                    results["failed"] += 1
-            except Exception as e:
-                logger.error(f"Failed to send invoice notification to user {binding.user_id}: {e}")
-                results["failed"] += 1
-        
-        logger.info(f"Invoice notifications sent: {results}")
+        # One message per recipient so the Slack calls run in parallel
+        # across workers instead of serially in this task
+        if bindings:
+            invoice_number = invoice.invoice_number or str(invoice.id)
+            job = group(
+                notify_invoice_binding.s(invoice_number, invoice.total_cents, str(binding.user_id))
+                for binding in bindings
+            ).apply_async()
+            results["queued"] = len(bindings)
+            results["group_id"] = job.id
+        
+        logger.info(f"Invoice notifications queued: {results}")
         return results
         
     except Exception as e:
         logger.error(f"Error in send_invoice_notifications: {e}", exc_info=True)
         return {"status": "error", "message": str(e)}
-    finally:
-        db.close()
+
+
+@celery_app.task
+def notify_invoice_binding(invoice_number: str, total_cents: int, user_id: str) -> dict:
+    """Send one invoice-ready Slack notification.
+    
+    Args:
+        invoice_number: Invoice number shown in the message
+        total_cents: Invoice total in cents
+        user_id: UUID of the user to notify
+        
+    Returns:
+        Dictionary with the send result
+    """
+    db = TaskSession()
+    try:
+        success = SlackIntegrationService().notify_invoice_ready(
+            invoice_number,
+            total_cents,
+            UUID(user_id),
+            db
+        )
+    except Exception as e:
+        logger.error(f"Failed to send invoice notification to user {user_id}: {e}")
+        success = False
+    
+    return {"status": "sent" if success else "failed", "user_id": user_id}
 
 
 @celery_app.task(
@@ -318,13 +362,13 @@ def sync_slack_status(self, user_id=None):
     Returns:
         dict: Status sync summary
     """
-    db = SessionLocal()
+    db = TaskSession()
     try:
-        from app.config.settings import Settings
+        from app.config.settings import get_settings
         
         logger.info(f"Syncing Slack status (user_id={user_id})")
         
-        settings = Settings()
+        settings = get_settings()
         if not settings.slack_bot_token:
             logger.warning("Slack bot token not configured")
             return {"status": "skipped", "message": "No Slack token"}
@@ -335,17 +379,26 @@ def sync_slack_status(self, user_id=None):
             "errors": [],
         }
         
-        from slack_sdk import WebClient
-        slack_client = WebClient(token=settings.slack_bot_token)
+        # Reuse the shared notification service's client so repeated runs keep
+        # their connections
+        slack_client = get_slack_notification_service().client
         
         # Get Slack integrations
         bindings = db.query(SlackUserBinding).all() if not user_id else \
                    db.query(SlackUserBinding).filter(SlackUserBinding.user_id == user_id).all()
         
+        # A full sync reads the whole workspace with paged users.list calls
+        # instead of one users.info request per binding
+        users_by_id = _list_slack_users(slack_client) if not user_id and bindings else None
+        
         for binding in bindings:
             try:
-                response = slack_client.users_info(user=binding.slack_user_id)
-                slack_user = response["user"]
+                if users_by_id is None:
+                    slack_user = slack_client.users_info(user=binding.slack_user_id)["user"]
+                else:
+                    slack_user = users_by_id.get(binding.slack_user_id)
+                    if slack_user is None:
+                        raise LookupError(f"Slack user {binding.slack_user_id} not in workspace")
                 
                 is_busy = slack_user.get("profile", {}).get("status_emoji") == ":spiral_calendar_pad:"
                 logger.debug(f"User {binding.user_id} Slack status: busy={is_busy}")
@@ -362,8 +415,6 @@ def sync_slack_status(self, user_id=None):
     except Exception as exc:
         logger.error(f"Slack status sync failed: {exc}", exc_info=True)
         raise self.retry(exc=exc, countdown=60 * (2 ** self.request.retries))
-    finally:
-        db.close()
 
 
 @celery_app.task(
@@ -384,7 +435,7 @@ def health_check_integrations(self):
     Returns:
         dict: Health check results
     """
-    db = SessionLocal()
+    db = TaskSession()
     try:
         logger.info("Running integration health checks")
         
@@ -395,43 +446,71 @@ def health_check_integrations(self):
             "issues": [],
         }
         
-        # Check calendar integrations
-        calendars = db.query(CalendarIntegration).filter(
-            CalendarIntegration.is_active == True
+        # Calendars whose token stays valid past the margin need no refresh
+        # soon; count them healthy without calling the provider
+        token_cutoff = datetime.now(timezone.utc) + _TOKEN_FRESH_MARGIN
+        fresh_count = db.query(func.count(CalendarIntegration.id)).join(
+            CalendarIntegration.oauth_account
+        ).filter(
+            CalendarIntegration.is_active == True,
+            UserOAuthAccount.access_token.isnot(None),
+            UserOAuthAccount.expires_at > token_cutoff,
+        ).scalar()
+        
+        # Probe the rest: missing, non-expiring or soon-expiring tokens
+        calendars = db.query(CalendarIntegration).options(
+            selectinload(CalendarIntegration.oauth_account)
+        ).outerjoin(
+            CalendarIntegration.oauth_account
+        ).filter(
+            CalendarIntegration.is_active == True,
+            or_(
+                UserOAuthAccount.id.is_(None),
+                UserOAuthAccount.access_token.is_(None),
+                UserOAuthAccount.expires_at.is_(None),
+                UserOAuthAccount.expires_at <= token_cutoff,
+            ),
         ).all()
         
-        summary["calendars_checked"] = len(calendars)
+        summary["calendars_checked"] = fresh_count + len(calendars)
+        summary["healthy"] = fresh_count
+        summary["probes_skipped"] = fresh_count
         
+        # Provider services only hold settings; build each once per run
+        services = {
+            "google": GoogleCalendarService(),
+            "microsoft": OutlookCalendarService(),
+        }
+        
+        # Probe with plain values only; the session stays on this thread
+        probes = []
         for calendar in calendars:
-            try:
-                if not calendar.oauth_account or not calendar.oauth_account.access_token:
-                    summary["unhealthy"] += 1
-                    summary["issues"].append({
-                        "calendar_id": str(calendar.id),
-                        "provider": calendar.provider,
-                        "error": "No valid token"
-                    })
-                    continue
-                
-                # Attempt a simple API call to test connectivity
-                if calendar.provider == "google":
-                    service = GoogleCalendarService()
-                    service.list_calendars(calendar.oauth_account.access_token)
-                elif calendar.provider == "microsoft":
-                    service = OutlookCalendarService()
-                    service.list_calendars(calendar.oauth_account.access_token)
-                
-                summary["healthy"] += 1
-                logger.debug(f"Calendar {calendar.id} ({calendar.provider}) is healthy")
-                
-            except Exception as e:
-                logger.warning(f"Calendar {calendar.id} health check failed: {e}")
+            if not calendar.oauth_account or not calendar.oauth_account.access_token:
                 summary["unhealthy"] += 1
                 summary["issues"].append({
                     "calendar_id": str(calendar.id),
                     "provider": calendar.provider,
-                    "error": str(e)
+                    "error": "No valid token"
                 })
+                continue
+            probes.append((str(calendar.id), calendar.provider, calendar.oauth_account.access_token))
+        
+        if probes:
+            with ThreadPoolExecutor(max_workers=min(_HEALTH_CHECK_WORKERS, len(probes))) as pool:
+                errors = list(pool.map(lambda probe: _probe_calendar(services, *probe), probes))
+            
+            for (calendar_id, provider, _), error in zip(probes, errors):
+                if error is None:
+                    summary["healthy"] += 1
+                    logger.debug(f"Calendar {calendar_id} ({provider}) is healthy")
+                else:
+                    logger.warning(f"Calendar {calendar_id} health check failed: {error}")
+                    summary["unhealthy"] += 1
+                    summary["issues"].append({
+                        "calendar_id": calendar_id,
+                        "provider": provider,
+                        "error": error
+                    })
         
         logger.info(f"Integration health check complete: {summary}")
         return summary
@@ -439,5 +518,34 @@ def health_check_integrations(self):
     except Exception as exc:
         logger.error(f"Health check task failed: {exc}", exc_info=True)
         raise self.retry(exc=exc, countdown=300 * (2 ** self.request.retries))
-    finally:
-        db.close()
+
+
+def _list_slack_users(slack_client) -> dict[str, dict]:
+    """Fetch every workspace user, 200 per request, keyed by Slack user id."""
+    users_by_id: dict[str, dict] = {}
+    cursor = None
+    while True:
+        response = slack_client.users_list(limit=200, cursor=cursor)
+        for member in response["members"]:
+            users_by_id[member["id"]] = member
+        cursor = response.get("response_metadata", {}).get("next_cursor")
+        if not cursor:
+            return users_by_id
+
+
+def _probe_calendar(services: dict, calendar_id: str, provider: str, access_token: str) -> str | None:
+    """Make one lightweight provider API call for a calendar.
+    
+    Runs on a pool thread, so it only receives plain values.
+    
+    Returns:
+        None if the provider answered, otherwise the error message
+    """
+    try:
+        # Attempt a simple API call to test connectivity
+        service = services.get(provider)
+        if service:
+            service.list_calendars(access_token)
+        return None
+    except Exception as e:
+        return str(e)
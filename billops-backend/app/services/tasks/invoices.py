@@ -1,22 +1,32 @@
 """Invoice generation and management async tasks."""
 import logging
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, time, timedelta, timezone
+from functools import lru_cache
 from typing import Optional, List
 
-from sqlalchemy.orm import Session
+from sqlalchemy import func, text
+from sqlalchemy.exc import IntegrityError, ProgrammingError
+from sqlalchemy.orm import Session, load_only, selectinload
 
 from app.celery_app import celery_app
-from app.db.session import SessionLocal
+from app.db.session import TaskSession, engine
+from app.models.client import Client
 from app.models.invoice import Invoice
 from app.models.user import User
 from app.models.time_entry import TimeEntry
-from app.services.notifications.email import EmailNotificationService
-from app.services.notifications.slack import SlackNotificationService
+from app.services.notifications.email import get_email_notification_service
+from app.services.notifications.slack import get_slack_notification_service
 from app.services.tasks.notifications import send_invoice_email, send_payment_email
 from app.config.settings import Settings
 
 logger = logging.getLogger(__name__)
 
+# Rows fetched per page when sweeping large tables
+_SWEEP_PAGE_SIZE = 500
+
+# Generated invoices are due this long after the billing period ends
+_DUE_DELTA = timedelta(days=30)
+
 
 @celery_app.task(
     bind=True,
@@ -30,9 +40,9 @@ def generate_pending_invoices(self, billing_period: Optional[str] = None):
     
     This task:
     - Identifies completed billing periods
-    - Calculates billable hours and amounts
+    - Prices approved time at each user's hourly rate
     - Groups by client
-    - Creates draft invoices
+    - Creates or updates one draft invoice per client
     - Sets due dates
     
     Args:
@@ -41,15 +51,18 @@ def generate_pending_invoices(self, billing_period: Optional[str] = None):
     Returns:
         dict: Generation summary with invoice counts
     """
-    db = SessionLocal()
+    db = TaskSession()
     try:
         logger.info(f"Generating pending invoices (period={billing_period})")
         
+        # One timestamp for the whole run
+        now = datetime.now(timezone.utc)
+        
         # Parse billing period or use previous month
         if billing_period:
             year, month = map(int, billing_period.split("-"))
         else:
-            today = datetime.now(timezone.utc).date()
+            today = now.date()
             if today.day < 15:
                 # Use previous month
                 first_of_this_month = today.replace(day=1)
@@ -59,11 +72,7 @@ def generate_pending_invoices(self, billing_period: Optional[str] = None):
                 year, month = today.year, today.month
         
         # Get start and end of billing period
-        period_start = datetime(year, month, 1, tzinfo=timezone.utc)
-        if month == 12:
-            period_end = datetime(year + 1, 1, 1, tzinfo=timezone.utc)
-        else:
-            period_end = datetime(year, month + 1, 1, tzinfo=timezone.utc)
+        period_start, period_end = _period_bounds(year, month)
         
         logger.info(f"Generating invoices for {year}-{month:02d}")
         
@@ -71,105 +80,157 @@ def generate_pending_invoices(self, billing_period: Optional[str] = None):
             "period": f"{year}-{month:02d}",
             "invoices_created": 0,
             "invoices_updated": 0,
-            "total_amount": 0,
+            "total_cents": 0,
             "by_client": {},
             "errors": [],
         }
         
-        # Get all users with time entries in period
-        entries = db.query(TimeEntry).filter(
-            TimeEntry.start_time >= period_start,
-            TimeEntry.start_time < period_end,
-            TimeEntry.billable == True,
-        ).all()
+        # Approved time per client, priced at each user's hourly rate and
+        # summed in the database (cent-minutes, divided by 60 below)
+        totals = db.query(
+            TimeEntry.client_id,
+            func.sum(TimeEntry.duration_minutes * func.coalesce(User.hourly_rate_cents, 0)),
+        ).join(User, User.id == TimeEntry.user_id).filter(
+            TimeEntry.started_at >= period_start,
+            TimeEntry.started_at < period_end,
+            TimeEntry.status == "approved",
+        ).group_by(TimeEntry.client_id).all()
         
-        # Group by user and client
-        from collections import defaultdict
-        by_user_client = defaultdict(list)
+        if totals:
+            _ensure_invoice_sequence(period_start)
         
-        for entry in entries:
-            key = (str(entry.user_id), str(entry.client_id) if entry.client_id else None)
-            by_user_client[key].append(entry)
+        # Draft invoices already generated for this period, keyed by client;
+        # the period lives in meta, where generate_invoice_task reads it.
+        # Sent or paid invoices are final, so newly approved time for their
+        # client goes on a new draft instead.
+        period_meta = {
+            "period_start": period_start.isoformat(),
+            "period_end": period_end.isoformat(),
+        }
+        existing_invoices = {
+            str(invoice.client_id): invoice
+            for invoice in db.query(Invoice).filter(
+                Invoice.client_id.in_([entry_client_id for entry_client_id, _ in totals]),
+                Invoice.meta["period_start"].as_string() == period_meta["period_start"],
+                Invoice.status == "draft",
+            ).all()
+        } if totals else {}
         
-        # Create invoices for each user-client combination
-        for (user_id, client_id), entries in by_user_client.items():
+        # Create one invoice per client
+        for entry_client_id, rate_minutes in totals:
+            client_id = str(entry_client_id)
             try:
-                user = db.query(User).filter(User.id == user_id).first()
-                if not user:
-                    continue
-                
-                # Calculate totals
-                total_hours = sum(e.duration_minutes for e in entries) / 60.0
-                hourly_rate = user.hourly_rate or 0
-                invoice_amount = total_hours * hourly_rate
+                # Calculate totals in integer cents (rounded down to the cent)
+                amount_cents = int(rate_minutes or 0) // 60
                 
-                # Check if invoice already exists for this period
-                existing = db.query(Invoice).filter(
-                    Invoice.user_id == user_id,
-                    Invoice.client_id == client_id,
-                    Invoice.period_start == period_start,
-                    Invoice.period_end == period_end,
-                ).first()
+                existing = existing_invoices.get(client_id)
+                # Each client's write gets its own savepoint, so a failing row
+                # rolls back alone instead of aborting the whole run
+                with db.begin_nested():
+                    if existing:
+                        # Update existing draft, keeping any tax already set
+                        existing.subtotal_cents = amount_cents
+                        existing.total_cents = amount_cents + (existing.tax_cents or 0)
+                        existing.updated_at = now
+                    else:
+                        # Create new invoice
+                        invoice = Invoice(
+                            client_id=entry_client_id,
+                            invoice_number=_generate_invoice_number(db, period_start),
+                            subtotal_cents=amount_cents,
+                            total_cents=amount_cents,
+                            status="draft",
+                            due_date=period_end + _DUE_DELTA,
+                            meta=dict(period_meta),
+                            created_at=now,
+                            updated_at=now,
+                        )
+                        db.add(invoice)
                 
                 if existing:
-                    # Update existing invoice
-                    existing.total_amount = invoice_amount
-                    existing.updated_at = datetime.now(timezone.utc)
-                    db.commit()
                     summary["invoices_updated"] += 1
                     logger.info(f"Updated invoice {existing.id}")
                 else:
-                    # Create new invoice
-                    invoice = Invoice(
-                        user_id=user_id,
-                        client_id=client_id,
-                        invoice_number=self._generate_invoice_number(user_id, period_start),
-                        period_start=period_start,
-                        period_end=period_end,
-                        total_amount=invoice_amount,
-                        status="draft",
-                        due_date=period_end + timedelta(days=30),
-                        created_at=datetime.now(timezone.utc),
-                    )
-                    db.add(invoice)
-                    db.commit()
                     summary["invoices_created"] += 1
-                    logger.info(f"Created invoice {invoice.id}")
+                    logger.info(f"Created invoice for client {client_id}")
                 
-                summary["total_amount"] += invoice_amount
-                if client_id not in summary["by_client"]:
-                    summary["by_client"][client_id or "unassigned"] = {
-                        "count": 0,
-                        "amount": 0,
-                    }
-                summary["by_client"][client_id or "unassigned"]["count"] += 1
-                summary["by_client"][client_id or "unassigned"]["amount"] += invoice_amount
+                summary["total_cents"] += amount_cents
+                summary["by_client"][client_id] = {
+                    "count": 1,
+                    "amount_cents": amount_cents,
+                }
                 
             except Exception as e:
-                logger.error(f"Error creating invoice for user {user_id}, client {client_id}: {e}")
+                logger.error(f"Error creating invoice for client {client_id}: {e}")
                 summary["errors"].append({
-                    "user_id": user_id,
                     "client_id": client_id,
                     "error": str(e)
                 })
         
+        # Commit every invoice whose savepoint succeeded
+        db.commit()
+        
         logger.info(f"Invoice generation complete: {summary}")
         return summary
         
     except Exception as exc:
         logger.error(f"Invoice generation failed: {exc}", exc_info=True)
         raise self.retry(exc=exc, countdown=120 * (2 ** self.request.retries))
-    finally:
-        db.close()
+
+
+@lru_cache(maxsize=32)
+def _period_bounds(year: int, month: int) -> tuple[datetime, datetime]:
+    """Return the UTC [start, end) datetimes of a billing month."""
+    period_start = datetime(year, month, 1, tzinfo=timezone.utc)
+    if month == 12:
+        period_end = datetime(year + 1, 1, 1, tzinfo=timezone.utc)
+    else:
+        period_end = datetime(year, month + 1, 1, tzinfo=timezone.utc)
+    return period_start, period_end
+
+
+def _invoice_sequence(period_start: datetime) -> str:
+    """Return the name of a billing month's invoice number sequence."""
+    # Built from integers only, so safe to interpolate as an identifier
+    return f"invoice_seq_{period_start.year}_{period_start.month:02d}"
+
+
+def _ensure_invoice_sequence(period_start: datetime) -> None:
+    """Create a billing month's invoice number sequence if it is missing.
+    
+    Runs on its own autocommit connection, once per generation run, so the
+    DDL neither joins nor holds locks for the run's transaction. Two first
+    runs for a month can still race on the catalog; the loser's duplicate
+    error means the sequence exists, so it is ignored.
+    
+    Args:
+        period_start: Start of the billing period being invoiced
+    """
+    sequence = _invoice_sequence(period_start)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        try:
+            conn.execute(text(f"CREATE SEQUENCE IF NOT EXISTS {sequence}"))
+        except (IntegrityError, ProgrammingError) as e:
+            logger.info(f"Invoice sequence {sequence} created concurrently: {e}")
+
+
+def _generate_invoice_number(db: Session, period_start: datetime) -> str:
+    """Generate a unique invoice number from a per-month database sequence.
     
-    def _generate_invoice_number(self, user_id: str, period_start: datetime) -> str:
-        """Generate a unique invoice number."""
-        # Format: INV-YYYY-MM-XXXX (where XXXX is sequential)
-        year = period_start.year
-        month = period_start.month
-        # In production, query last invoice number and increment
-        seq = 1
-        return f"INV-{year}-{month:02d}-{seq:04d}"
+    Format: INV-YYYY-MM-XXXX. ``nextval`` is atomic, so concurrent runs
+    never hand out the same number. The sequence must already exist (see
+    ``_ensure_invoice_sequence``).
+    
+    Args:
+        db: Database session
+        period_start: Start of the billing period being invoiced
+    
+    Returns:
+        The next invoice number for that month
+    """
+    sequence = _invoice_sequence(period_start)
+    seq = db.execute(text("SELECT nextval(:sequence)"), {"sequence": sequence}).scalar_one()
+    return f"INV-{period_start.year}-{period_start.month:02d}-{seq:04d}"
 
 
 @celery_app.task(
@@ -194,7 +255,7 @@ def send_pending_invoices(self, invoice_status: str = "draft"):
     Returns:
         dict: Send summary
     """
-    db = SessionLocal()
+    db = TaskSession()
     try:
         logger.info(f"Sending pending invoices (status={invoice_status})")
         
@@ -205,40 +266,57 @@ def send_pending_invoices(self, invoice_status: str = "draft"):
             "errors": [],
         }
         
-        # Get invoices to send
-        invoices = db.query(Invoice).filter(
-            Invoice.status == invoice_status,
-            Invoice.client_id.isnot(None),
-        ).all()
-        
-        for invoice in invoices:
-            try:
-                client = invoice.client
-                if not client or not client.email:
-                    logger.warning(f"Invoice {invoice.id} has no client email")
-                    continue
-                
-                # Queue email sending
-                send_invoice_email.delay(
-                    invoice_id=str(invoice.id),
-                    recipient_email=client.email,
-                    recipient_name=client.name,
+        # Get invoices to send, a page at a time in id order. Sent invoices
+        # drop out of the status filter, so paging continues from the last id
+        last_id = None
+        while True:
+            query = db.query(Invoice).options(
+                load_only(Invoice.id, Invoice.client_id),
+                selectinload(Invoice.client).load_only(Client.name, Client.contact_email),
+            ).filter(
+                Invoice.status == invoice_status,
+                Invoice.client_id.isnot(None),
+            )
+            if last_id is not None:
+                query = query.filter(Invoice.id > last_id)
+            invoices = query.order_by(Invoice.id).limit(_SWEEP_PAGE_SIZE).all()
+            if not invoices:
+                break
+            last_id = invoices[-1].id
+            
+            sent_ids = []
+            for invoice in invoices:
+                try:
+                    client = invoice.client
+                    if not client or not client.contact_email:
+                        logger.warning(f"Invoice {invoice.id} has no client email")
+                        continue
+                    
+                    # Queue email sending
+                    send_invoice_email.delay(
+                        invoice_id=str(invoice.id),
+                        recipient_email=client.contact_email,
+                        recipient_name=client.name,
+                    )
+                    summary["emails_sent"] += 1
+                    sent_ids.append(invoice.id)
+                    logger.info(f"Queued send for invoice {invoice.id}")
+                    
+                except Exception as e:
+                    logger.error(f"Error sending invoice {invoice.id}: {e}")
+                    summary["errors"].append({
+                        "invoice_id": str(invoice.id),
+                        "error": str(e)
+                    })
+            
+            # Mark the page's queued invoices as sent in one statement
+            if sent_ids:
+                db.query(Invoice).filter(Invoice.id.in_(sent_ids)).update(
+                    {Invoice.status: "sent", Invoice.updated_at: datetime.now(timezone.utc)},
+                    synchronize_session=False,
                 )
-                summary["emails_sent"] += 1
-                
-                # Update invoice status
-                invoice.status = "sent"
-                invoice.sent_at = datetime.now(timezone.utc)
                 db.commit()
-                summary["invoices_sent"] += 1
-                logger.info(f"Queued send for invoice {invoice.id}")
-                
-            except Exception as e:
-                logger.error(f"Error sending invoice {invoice.id}: {e}")
-                summary["errors"].append({
-                    "invoice_id": str(invoice.id),
-                    "error": str(e)
-                })
+                summary["invoices_sent"] += len(sent_ids)
         
         logger.info(f"Pending invoice send complete: {summary}")
         return summary
@@ -246,8 +324,6 @@ def send_pending_invoices(self, invoice_status: str = "draft"):
     except Exception as exc:
         logger.error(f"Pending invoice send failed: {exc}", exc_info=True)
         raise self.retry(exc=exc, countdown=120 * (2 ** self.request.retries))
-    finally:
-        db.close()
 
 
 @celery_app.task(
@@ -266,16 +342,20 @@ def send_payment_reminders(self, days_before_due: int = 7):
     Returns:
         dict: Reminder summary
     """
-    db = SessionLocal()
+    db = TaskSession()
     try:
         logger.info(f"Sending payment reminders (due in {days_before_due} days)")
         
-        # Find invoices due in N days
+        # Find invoices due in N days, as a half-open range over that UTC day
+        # so the (status, due_date) index can be used
         target_date = datetime.now(timezone.utc).date() + timedelta(days=days_before_due)
+        day_start = datetime.combine(target_date, time.min, tzinfo=timezone.utc)
+        day_end = day_start + timedelta(days=1)
         
         invoices = db.query(Invoice).filter(
-            Invoice.due_date.cast(type(datetime.now().date())) == target_date,
             Invoice.status.in_(["sent", "overdue"]),
+            Invoice.due_date >= day_start,
+            Invoice.due_date < day_end,
         ).all()
         
         summary = {
@@ -283,19 +363,19 @@ def send_payment_reminders(self, days_before_due: int = 7):
             "errors": [],
         }
         
-        notification_service = EmailNotificationService()
+        notification_service = get_email_notification_service()
         
         for invoice in invoices:
             try:
                 client = invoice.client
-                if not client or not client.email:
+                if not client or not client.contact_email:
                     continue
                 
                 notification_service.send_invoice_overdue_alert(
-                    recipient_email=client.email,
+                    recipient_email=client.contact_email,
                     recipient_name=client.name,
                     invoice_number=invoice.invoice_number,
-                    invoice_total_cents=int(invoice.total_amount * 100),
+                    invoice_total_cents=invoice.total_cents,
                     days_overdue=0,  # Not yet overdue, just reminder
                 )
                 summary["reminders_sent"] += 1
@@ -313,8 +393,6 @@ def send_payment_reminders(self, days_before_due: int = 7):
     except Exception as exc:
         logger.error(f"Payment reminder task failed: {exc}", exc_info=True)
         raise self.retry(exc=exc, countdown=120 * (2 ** self.request.retries))
-    finally:
-        db.close()
 
 
 @celery_app.task(
@@ -333,7 +411,7 @@ def cleanup_old_tasks(self, days: int = 30):
     Returns:
         dict: Cleanup summary
     """
-    db = SessionLocal()
+    db = TaskSession()
     try:
         from celery.result import AsyncResult
         
@@ -353,5 +431,3 @@ def cleanup_old_tasks(self, days: int = 30):
     except Exception as exc:
         logger.error(f"Cleanup task failed: {exc}", exc_info=True)
         raise self.retry(exc=exc, countdown=300 * (2 ** self.request.retries))
-    finally:
-        db.close()
@@ -2,7 +2,8 @@
 import logging
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from celery import group
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 from app.celery_app import celery_app
 from app.db.session import SessionLocal
@@ -13,8 +14,8 @@ from app.services.invoices.generator import (
     generate_pdf_from_html,
     build_invoice_context,
 )
-from app.services.notifications.email import EmailNotificationService
-from app.services.notifications.slack import SlackNotificationService
+from app.services.notifications.email import get_email_notification_service
+from app.services.notifications.slack import get_slack_notification_service
 
 logger = logging.getLogger(__name__)
 
@@ -41,7 +42,11 @@ def send_invoice_email(
     db = SessionLocal()
     try:
         invoice_uuid = UUID(invoice_id)
-        invoice = db.query(Invoice).filter(Invoice.id == invoice_uuid).first()
+        invoice = db.query(Invoice).options(
+            joinedload(Invoice.client),
+            joinedload(Invoice.project),
+            selectinload(Invoice.line_items),
+        ).filter(Invoice.id == invoice_uuid).first()
 
         if not invoice:
             logger.error(f"Invoice {invoice_uuid} not found")
@@ -59,7 +64,7 @@ def send_invoice_email(
         pdf_bytes = generate_pdf_from_html(html_content)
 
         # Send email
-        email_service = EmailNotificationService()
+        email_service = get_email_notification_service()
         success = email_service.send_invoice_notification(
             recipient_email=recipient_email,
             recipient_name=recipient_name,
@@ -113,13 +118,16 @@ def send_invoice_slack(
     db = SessionLocal()
     try:
         invoice_uuid = UUID(invoice_id)
-        invoice = db.query(Invoice).filter(Invoice.id == invoice_uuid).first()
+        invoice = db.query(Invoice).options(
+            joinedload(Invoice.client),
+            joinedload(Invoice.project),
+        ).filter(Invoice.id == invoice_uuid).first()
 
         if not invoice:
             logger.error(f"Invoice {invoice_uuid} not found")
             return {"status": "error", "message": "Invoice not found"}
 
-        slack_service = SlackNotificationService()
+        slack_service = get_slack_notification_service()
 
         if include_details:
             success = slack_service.send_invoice_details(
@@ -195,7 +203,7 @@ def send_payment_email(
             logger.error(f"Invoice {invoice_uuid} not found")
             return {"status": "error", "message": "Invoice not found"}
 
-        email_service = EmailNotificationService()
+        email_service = get_email_notification_service()
         success = email_service.send_payment_confirmation(
             recipient_email=recipient_email,
             recipient_name=recipient_name,
@@ -245,13 +253,15 @@ def send_payment_slack(
     db = SessionLocal()
     try:
         invoice_uuid = UUID(invoice_id)
-        invoice = db.query(Invoice).filter(Invoice.id == invoice_uuid).first()
+        invoice = db.query(Invoice).options(
+            joinedload(Invoice.client)
+        ).filter(Invoice.id == invoice_uuid).first()
 
         if not invoice:
             logger.error(f"Invoice {invoice_uuid} not found")
             return {"status": "error", "message": "Invoice not found"}
 
-        slack_service = SlackNotificationService()
+        slack_service = get_slack_notification_service()
         success = slack_service.send_payment_notification(
             channel=slack_channel,
             invoice_number=invoice.invoice_number,
@@ -305,7 +315,9 @@ def send_overdue_invoice_alert(
     db = SessionLocal()
     try:
         invoice_uuid = UUID(invoice_id)
-        invoice = db.query(Invoice).filter(Invoice.id == invoice_uuid).first()
+        invoice = db.query(Invoice).options(
+            joinedload(Invoice.client)
+        ).filter(Invoice.id == invoice_uuid).first()
 
         if not invoice:
             logger.error(f"Invoice {invoice_uuid} not found")
@@ -314,7 +326,7 @@ def send_overdue_invoice_alert(
         results = {"email_sent": False, "slack_sent": False}
 
         # Send email alert
-        email_service = EmailNotificationService()
+        email_service = get_email_notification_service()
         email_success = email_service.send_invoice_overdue_alert(
             recipient_email=recipient_email,
             recipient_name=recipient_name,
@@ -326,7 +338,7 @@ def send_overdue_invoice_alert(
 
         # Send Slack alert if channel provided
         if slack_channel:
-            slack_service = SlackNotificationService()
+            slack_service = get_slack_notification_service()
             slack_success = slack_service.send_overdue_invoice_alert(
                 channel=slack_channel,
                 invoice_number=invoice.invoice_number,
@@ -371,8 +383,10 @@ def check_overdue_invoices() -> dict:
 
         now = datetime.now(timezone.utc)
 
-        # Find overdue invoices
-        overdue_invoices = db.query(Invoice).filter(
+        # Find overdue invoices, with their clients in one extra query
+        overdue_invoices = db.query(Invoice).options(
+            selectinload(Invoice.client)
+        ).filter(
             Invoice.due_date < now,
             Invoice.status.in_(["sent", "partial"]),
         ).all()
@@ -381,23 +395,27 @@ def check_overdue_invoices() -> dict:
             "total_checked": len(overdue_invoices),
             "alerts_sent": 0,
             "failed": 0,
+            "group_id": None,
         }
 
-        for invoice in overdue_invoices:
-            days_overdue = (now - invoice.due_date).days
-
-            # Send alert task
-            task = send_overdue_invoice_alert.delay(
+        # Publish every alert in one group instead of one .delay() each
+        alerts = [
+            send_overdue_invoice_alert.s(
                 invoice_id=str(invoice.id),
-                recipient_email=invoice.client.email or "",
+                recipient_email=invoice.client.contact_email or "",
                 recipient_name=invoice.client.name,
-                days_overdue=days_overdue,
+                days_overdue=(now - invoice.due_date).days,
             )
-
-            if task:
-                results["alerts_sent"] += 1
-            else:
-                results["failed"] += 1
+            for invoice in overdue_invoices
+        ]
+        if alerts:
+            try:
+                job = group(alerts).apply_async()
+                results["alerts_sent"] = len(alerts)
+                results["group_id"] = job.id
+            except Exception as e:
+                logger.error(f"Failed to schedule overdue alerts: {e}")
+                results["failed"] = len(alerts)
 
         logger.info(f"Overdue invoice check completed: {results}")
         return results
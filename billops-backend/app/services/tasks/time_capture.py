@@ -3,18 +3,25 @@ import logging
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
+from sqlalchemy import case, func, select
 from sqlalchemy.orm import Session
 
 from app.celery_app import celery_app
 from app.db.session import SessionLocal
 from app.models.time_entry import TimeEntry
 from app.models.user import User
-from app.services.notifications.email import EmailNotificationService
-from app.services.notifications.slack import SlackNotificationService
-from app.config.settings import Settings
+from app.services.notifications.email import get_email_notification_service
+from app.services.notifications.slack import get_slack_notification_service
+from app.config.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Entries listed per user in the daily summary email
+_SUMMARY_ENTRY_LIMIT = 10
+
+# Entry statuses that count towards billable hours (invoiced or to be)
+_BILLABLE_STATUSES = ("approved", "billed")
+
 
 @celery_app.task(
     bind=True,
@@ -107,7 +114,7 @@ def aggregate_daily_time_entries(self, date_str: Optional[str] = None):
         dict: Aggregation summary
     """
     db = SessionLocal()
-    settings = Settings()
+    settings = get_settings()
     
     try:
         # Parse date or use yesterday
@@ -118,63 +125,99 @@ def aggregate_daily_time_entries(self, date_str: Optional[str] = None):
         
         logger.info(f"Aggregating time entries for {target_date}")
         
-        # Get all entries for the day
+        # Bounds of the day
         start_of_day = datetime.combine(target_date, datetime.min.time(), tzinfo=timezone.utc)
         end_of_day = start_of_day + timedelta(days=1)
         
-        entries = db.query(TimeEntry).filter(
-            TimeEntry.start_time >= start_of_day,
-            TimeEntry.start_time < end_of_day,
+        day_filter = (
+            TimeEntry.started_at >= start_of_day,
+            TimeEntry.started_at < end_of_day,
+        )
+        billable = TimeEntry.status.in_(_BILLABLE_STATUSES)
+        
+        # Sum each user's day in the database
+        totals = db.execute(
+            select(
+                TimeEntry.user_id,
+                func.sum(TimeEntry.duration_minutes).label("mins"),
+                func.sum(
+                    case((billable, TimeEntry.duration_minutes), else_=0)
+                ).label("bmins"),
+                func.count().label("n"),
+            )
+            .where(*day_filter)
+            .group_by(TimeEntry.user_id)
         ).all()
         
-        # Group by user
-        by_user = {}
-        for entry in entries:
-            user_id = str(entry.user_id)
-            if user_id not in by_user:
-                by_user[user_id] = {
-                    "entries": [],
-                    "total_hours": 0,
-                    "total_billable_hours": 0,
-                }
-            
-            duration = entry.duration_minutes / 60.0
-            by_user[user_id]["entries"].append({
+        # Fetch only the first entries of each user's day for the summary
+        ranked = (
+            select(
+                TimeEntry.id,
+                TimeEntry.user_id,
+                TimeEntry.description,
+                TimeEntry.duration_minutes,
+                billable.label("billable"),
+                func.row_number().over(
+                    partition_by=TimeEntry.user_id,
+                    order_by=TimeEntry.started_at,
+                ).label("rn"),
+            )
+            .where(*day_filter)
+            .subquery()
+        )
+        
+        top_entries = db.execute(
+            select(ranked)
+            .where(ranked.c.rn <= _SUMMARY_ENTRY_LIMIT)
+            .order_by(ranked.c.user_id, ranked.c.rn)
+        ).all()
+        
+        entries_by_user = {}
+        for entry in top_entries:
+            entries_by_user.setdefault(str(entry.user_id), []).append({
                 "id": str(entry.id),
                 "description": entry.description,
-                "duration_hours": duration,
+                "duration_hours": entry.duration_minutes / 60.0,
                 "billable": entry.billable,
             })
-            by_user[user_id]["total_hours"] += duration
-            if entry.billable:
-                by_user[user_id]["total_billable_hours"] += duration
+        
+        summary_by_user = {
+            str(row.user_id): {
+                "entries": entries_by_user.get(str(row.user_id), []),
+                "entry_count": row.n,
+                "total_hours": row.mins / 60.0,
+                "total_billable_hours": row.bmins / 60.0,
+            }
+            for row in totals
+        }
+        total_entries = sum(row.n for row in totals)
         
         # Send notifications for users with activity
-        notification_service = EmailNotificationService()
-        for user_id_str, summary in by_user.items():
+        notification_service = get_email_notification_service()
+        for user_id_str, summary in summary_by_user.items():
             try:
                 user = db.query(User).filter(User.id == user_id_str).first()
                 if user and user.email:
                     notification_service.send_time_entry_reminder(
                         recipient_email=user.email,
-                        user_name=user.full_name or user.email.split("@")[0],
+                        user_name=user.name or user.email.split("@")[0],
                         summary_date=target_date,
                         total_hours=summary["total_hours"],
-                        entry_count=len(summary["entries"]),
-                        entries=summary["entries"][:10],  # Top 10 entries
+                        entry_count=summary["entry_count"],
+                        entries=summary["entries"],
                     )
             except Exception as e:
                 logger.warning(f"Failed to send time summary to user {user_id_str}: {e}")
         
         result = {
             "date": target_date.isoformat(),
-            "users_with_entries": len(by_user),
-            "total_entries": len(entries),
-            "summary_by_user": by_user,
+            "users_with_entries": len(summary_by_user),
+            "total_entries": total_entries,
+            "summary_by_user": summary_by_user,
             "timestamp": datetime.now(timezone.utc).isoformat(),
         }
         
-        logger.info(f"Daily aggregation completed: {len(entries)} entries for {len(by_user)} users")
+        logger.info(f"Daily aggregation completed: {total_entries} entries for {len(summary_by_user)} users")
         return result
         
     except Exception as exc:
@@ -303,13 +346,13 @@ def send_time_entry_reminders(self, reminder_type: str = "end_of_day"):
         dict: Reminders sent count
     """
     db = SessionLocal()
-    settings = Settings()
+    settings = get_settings()
     
     try:
         logger.info(f"Sending {reminder_type} time entry reminders")
         
-        notification_service = EmailNotificationService()
-        slack_service = SlackNotificationService(bot_token=settings.slack_bot_token)
+        notification_service = get_email_notification_service()
+        slack_service = get_slack_notification_service()
         
         reminders_sent = {
             "email": 0,
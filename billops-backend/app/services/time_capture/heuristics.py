@@ -4,7 +4,7 @@ Time-capture heuristics module.
 Implements activity grouping, merging, and intelligent time entry creation.
 """
 from datetime import datetime, timezone
-from typing import NamedTuple
+from typing import Iterable, NamedTuple
 
 from app.services.time_capture.classifier import SourceClassifier, ActivityType
 from app.services.time_capture.detector import IdleDetector
@@ -32,14 +32,15 @@ class ActivityHeuristics:
     
     @staticmethod
     def group_activities(
-        signals: list[dict],
+        signals: Iterable[dict],
         idle_threshold_minutes: int = 5,
         max_merge_idle_minutes: int = 10,
     ) -> list[list[dict]]:
-        """Group activity signals into coherent sessions."""
-        if not signals:
-            return []
+        """Group activity signals into coherent sessions.
         
+        ``signals`` is consumed once, so it may be a generator; only the
+        work-related signals are kept in memory.
+        """
         work_signals = [s for s in signals if SourceClassifier.is_work_related(s)]
         if not work_signals:
             return []
@@ -136,7 +137,7 @@ class ActivityHeuristics:
     
     @staticmethod
     def generate_time_entries(
-        signals: list[dict],
+        signals: Iterable[dict],
         idle_threshold_minutes: int = 5,
         max_merge_idle_minutes: int = 10,
     ) -> list[SuggestedTimeEntry]:
@@ -0,0 +1,21 @@
+"""
+Money Utilities
+
+Formats integer cent amounts without going through float.
+"""
+
+
+def fmt_cents(cents: int, symbol: str = "$") -> str:
+    """
+    Format an amount in cents as a currency string.
+
+    Args:
+        cents: Amount in cents (may be negative)
+        symbol: Currency symbol prefix
+
+    Returns:
+        Formatted amount, e.g. "$1,500.00" or "-$0.05"
+    """
+    sign = "-" if cents < 0 else ""
+    dollars, rem = divmod(abs(cents), 100)
+    return f"{sign}{symbol}{dollars:,}.{rem:02d}"
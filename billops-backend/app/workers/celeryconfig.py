@@ -24,6 +24,8 @@ enable_utc = True
 task_track_started = True
 task_time_limit = 30 * 60  # 30 minutes
 task_soft_time_limit = 25 * 60  # 25 minutes
+task_acks_late = True  # Ack after the task runs so a lost worker's task is redelivered
+task_reject_on_worker_lost = True
 
 # ============================================================================
 # RESULT BACKEND CONFIGURATION
@@ -36,7 +38,11 @@ result_persistent = True
 # WORKER CONFIGURATION
 # ============================================================================
 
-worker_prefetch_multiplier = 4
+# Reserve one task per process so long syncs and invoice runs don't hold
+# short notification tasks behind them. The "ingest" queue batches messages
+# and must be consumed by a dedicated worker started with
+# --prefetch-multiplier=0 (see scripts/worker.sh); other workers exclude it.
+worker_prefetch_multiplier = 1
 worker_max_tasks_per_child = 1000
 worker_disable_rate_limits = False
 
@@ -44,7 +50,14 @@ worker_disable_rate_limits = False
 # TASK ROUTES (Queue Assignment)
 # ============================================================================
 
+# First matching pattern wins, so the specific sync routes come first.
+# Long-running calendar syncs get their own "sync" queue; the short token
+# refresh sweep stays with the other integration jobs.
 task_routes = {
+    "app.services.tasks.integrations.sync_*_calendar": {"queue": "sync"},
+    "calendar:sync_*": {"queue": "sync"},
+    "calendar:refresh_tokens": {"queue": "integrations"},
+    "tasks.ingest_events": {"queue": "ingest"},
     "app.services.tasks.time_capture.*": {"queue": "time_capture"},
     "app.services.tasks.invoices.*": {"queue": "invoices"},
     "app.services.tasks.notifications.*": {"queue": "notifications"},
@@ -81,6 +94,16 @@ task_queues = {
         "routing_key": "integrations.*",
         "priority": 50,
     },
+    "sync": {
+        "exchange": "sync",
+        "routing_key": "sync.*",
+        "priority": 50,
+    },
+    "ingest": {
+        "exchange": "ingest",
+        "routing_key": "ingest.*",
+        "priority": 60,
+    },
 }
 
 # ============================================================================
@@ -132,13 +155,13 @@ beat_schedule = {
     "sync-google-calendar": {
         "task": "app.services.tasks.integrations.sync_google_calendar",
         "schedule": timedelta(minutes=30),  # Every 30 minutes
-        "options": {"queue": "integrations", "priority": 4},
+        "options": {"queue": "sync", "priority": 4},
         "kwargs": {},
     },
     "sync-outlook-calendar": {
         "task": "app.services.tasks.integrations.sync_outlook_calendar",
         "schedule": timedelta(minutes=30),  # Every 30 minutes
-        "options": {"queue": "integrations", "priority": 4},
+        "options": {"queue": "sync", "priority": 4},
         "kwargs": {},
     },
     "sync-slack-status": {
@@ -0,0 +1,35 @@
+"""Add payment query indexes
+
+Revision ID: 5b2d7e9f1a3c
+Revises: 4a8c9b1d2e3f
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2d7e9f1a3c'
+down_revision: Union[str, Sequence[str], None] = '4a8c9b1d2e3f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_payments_invoice_id_received_at',
+        'payments',
+        ['invoice_id', sa.text('received_at DESC')],
+        postgresql_include=['amount_cents'],
+    )
+    op.create_index('ix_payments_method', 'payments', ['method'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_payments_method', 'payments')
+    op.drop_index('ix_payments_invoice_id_received_at', 'payments')
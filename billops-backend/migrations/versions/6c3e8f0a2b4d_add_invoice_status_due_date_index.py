@@ -0,0 +1,28 @@
+"""Add invoice status/due date index
+
+Revision ID: 6c3e8f0a2b4d
+Revises: 5b2d7e9f1a3c
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c3e8f0a2b4d'
+down_revision: Union[str, Sequence[str], None] = '5b2d7e9f1a3c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_invoices_status_due_date', 'invoices', ['status', 'due_date'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_invoices_status_due_date', 'invoices')
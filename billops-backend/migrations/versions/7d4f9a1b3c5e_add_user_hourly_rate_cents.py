@@ -0,0 +1,28 @@
+"""Add user hourly rate in cents
+
+Revision ID: 7d4f9a1b3c5e
+Revises: 6c3e8f0a2b4d
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d4f9a1b3c5e'
+down_revision: Union[str, Sequence[str], None] = '6c3e8f0a2b4d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('hourly_rate_cents', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'hourly_rate_cents')
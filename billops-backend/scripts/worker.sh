@@ -1,2 +1,7 @@
 #!/usr/bin/env bash
-celery -A app.celery_app.celery worker -l info
+# General worker for every queue except "ingest"; batched ingest needs an
+# unbounded prefetch window so a batch of 50 can fill, so it runs separately
+trap 'kill 0' EXIT
+celery -A app.celery_app.celery worker -l info -Q ingest --prefetch-multiplier=0 -n ingest@%h &
+celery -A app.celery_app.celery worker -l info -X ingest -n worker@%h &
+wait
@@ -12,6 +12,7 @@ from fastapi.testclient import TestClient
 from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 
+from app.config.settings import get_settings
 from app.db.base import Base
 from app.db.session import get_db
 from app.main import app
@@ -24,12 +25,45 @@ from app.models.user import User
 from app.models.billing_rule import BillingRule
 from app.models.payment import Payment
 from app.core.hashing import hash_password
+from app.services import email_pool
+from app.services.notifications import queue as notification_queue
+from app.services.notifications.email import get_email_notification_service
+from app.services.notifications.slack import _get_web_client, get_slack_notification_service
+from app.services.billing_rule import invalidate_active_rule
 
 
 # Use in-memory SQLite for tests (or PostgreSQL test database)
 SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///:memory:"
 
 
+def _reset_process_singletons() -> None:
+    """Close and forget the shared SMTP pool and notification queue."""
+    if email_pool._smtp_pool is not None:
+        email_pool._smtp_pool.close_all()
+        email_pool._smtp_pool = None
+    if notification_queue._notification_queue is not None:
+        notification_queue._notification_queue.shutdown(timeout=2)
+        notification_queue._notification_queue = None
+
+
+@pytest.fixture(autouse=True)
+def clear_cached_settings():
+    """Reset memoized settings and clients so per-test env vars take effect."""
+    get_settings.cache_clear()
+    _get_web_client.cache_clear()
+    get_email_notification_service.cache_clear()
+    get_slack_notification_service.cache_clear()
+    invalidate_active_rule()
+    _reset_process_singletons()
+    yield
+    get_settings.cache_clear()
+    _get_web_client.cache_clear()
+    get_email_notification_service.cache_clear()
+    get_slack_notification_service.cache_clear()
+    invalidate_active_rule()
+    _reset_process_singletons()
+
+
 @pytest.fixture(scope="session")
 def engine():
     """Create test database engine."""
@@ -1,5 +1,6 @@
 """Tests for email and Slack notification services."""
 import json
+import smtplib
 from unittest.mock import Mock, patch, MagicMock
 import pytest
 
@@ -8,7 +9,9 @@ from app.services.email import (
     SendGridEmailProvider,
     AWSEmailProvider,
 )
+from app.services.email_pool import SMTPConnectionPool
 from app.services.notifications.email import EmailNotificationService
+from app.services.notifications.queue import CircuitBreaker, NotificationQueue
 from app.services.notifications.slack import SlackNotificationService
 from app.services.slack_message_formatter import (
     SlackMessageBuilder,
@@ -139,6 +142,15 @@ class TestSlackMessageBuilder:
 
         assert message["attachments"][0]["color"] == MessageColor.SUCCESS
 
+    def test_build_json(self):
+        """Test serializing the built message to JSON bytes."""
+        builder = SlackMessageBuilder()
+        builder.add_header("✅ Paid")
+        body = builder.build_json("test")
+
+        assert isinstance(body, bytes)
+        assert json.loads(body) == builder.build("test")
+
 
 class TestMessageFormatters:
     """Tests for message formatter functions."""
@@ -152,9 +164,9 @@ class TestMessageFormatters:
             status="sent",
         )
 
-        assert "blocks" in message
+        assert "blocks" in message["attachments"][0]
         assert "INV-001" in message["text"]
-        assert any("Acme Corp" in str(b) for b in message["blocks"])
+        assert any("Acme Corp" in str(b) for b in message["attachments"][0]["blocks"])
 
     def test_format_payment_message(self):
         """Test payment message formatting."""
@@ -164,8 +176,8 @@ class TestMessageFormatters:
             amount=1500.00,
         )
 
-        assert "blocks" in message
-        assert "Payment" in message["text"].lower() or "Payment" in str(message["blocks"])
+        assert "blocks" in message["attachments"][0]
+        assert "Payment" in message["text"].lower() or "Payment" in str(message["attachments"][0]["blocks"])
 
     def test_format_time_entry_message(self):
         """Test time entry message formatting."""
@@ -175,8 +187,8 @@ class TestMessageFormatters:
             project_name="Project A",
         )
 
-        assert "blocks" in message
-        assert "blocks" in message
+        assert "blocks" in message["attachments"][0]
+        assert "blocks" in message["attachments"][0]
 
     def test_format_daily_summary_message(self):
         """Test daily summary message formatting."""
@@ -185,7 +197,7 @@ class TestMessageFormatters:
             entry_count=3,
         )
 
-        assert "blocks" in message
+        assert "blocks" in message["attachments"][0]
         assert "Summary" in message["text"]
 
     def test_format_alert_message(self):
@@ -196,7 +208,7 @@ class TestMessageFormatters:
             alert_type="warning",
         )
 
-        assert "blocks" in message
+        assert "blocks" in message["attachments"][0]
         assert "Test Alert" in message["text"]
 
     def test_format_overdue_invoice_alert(self):
@@ -208,7 +220,7 @@ class TestMessageFormatters:
             days_overdue=5,
         )
 
-        assert "blocks" in message
+        assert "blocks" in message["attachments"][0]
         assert "Overdue" in message["text"]
 
 
@@ -279,6 +291,185 @@ class TestEmailService:
                 pass
 
 
+    def test_smtp_provider_reuses_connection(self, monkeypatch):
+        """Test SMTP provider opens one connection for multiple sends."""
+        monkeypatch.setenv("EMAIL_PROVIDER", "smtp")
+        monkeypatch.setenv("SMTP_HOST", "smtp.example.com")
+        monkeypatch.setenv("FROM_EMAIL", "test@example.com")
+
+        with patch("app.services.email.smtplib.SMTP") as mock_smtp:
+            mock_instance = mock_smtp.return_value
+            mock_instance.noop.return_value = (250, b"OK")
+            mock_instance.has_extn.return_value = False
+
+            with EmailService() as service:
+                assert service.send_email("a@example.com", "One", "<p>1</p>") is True
+                assert service.send_email("b@example.com", "Two", "<p>2</p>") is True
+
+            assert mock_smtp.call_count == 1
+            assert mock_instance.send_message.call_count == 2
+            mock_instance.quit.assert_called_once()
+
+    def test_smtp_pipelines_envelope_when_advertised(self, monkeypatch):
+        """Test MAIL FROM, RCPT TO and DATA go out in one write under PIPELINING."""
+        monkeypatch.setenv("EMAIL_PROVIDER", "smtp")
+        monkeypatch.setenv("SMTP_HOST", "smtp.example.com")
+        monkeypatch.setenv("FROM_EMAIL", "test@example.com")
+
+        with patch("app.services.email.smtplib.SMTP") as mock_smtp:
+            mock_instance = mock_smtp.return_value
+            mock_instance.has_extn.return_value = True
+            mock_instance.getreply.side_effect = [
+                (250, b"Sender OK"),
+                (250, b"Recipient OK"),
+                (354, b"Go ahead"),
+                (250, b"Queued"),
+            ]
+
+            with EmailService() as service:
+                assert service.send_email("a@example.com", "One", "<p>1</p>") is True
+
+            envelope, body = (call.args[0] for call in mock_instance.send.call_args_list)
+            assert envelope == "MAIL FROM:<test@example.com>\r\nRCPT TO:<a@example.com>\r\nDATA\r\n"
+            assert body.endswith(b"\r\n.\r\n")
+            mock_instance.send_message.assert_not_called()
+
+    def test_smtp_pipelined_refusal_resets_session(self, monkeypatch):
+        """Test a refused sender ends the pending DATA and resets the session."""
+        monkeypatch.setenv("EMAIL_PROVIDER", "smtp")
+        monkeypatch.setenv("SMTP_HOST", "smtp.example.com")
+        monkeypatch.setenv("FROM_EMAIL", "test@example.com")
+
+        with patch("app.services.email.smtplib.SMTP") as mock_smtp:
+            mock_instance = mock_smtp.return_value
+            mock_instance.has_extn.return_value = True
+            mock_instance.getreply.side_effect = [
+                (550, b"Sender rejected"),
+                (250, b"Recipient OK"),
+                (354, b"Go ahead"),
+                (250, b"Empty message"),
+            ]
+
+            with EmailService() as service:
+                assert service.send_email("a@example.com", "One", "<p>1</p>") is False
+
+            assert mock_instance.send.call_args_list[-1].args[0] == ".\r\n"
+            mock_instance.rset.assert_called_once()
+
+
+class TestSMTPConnectionPool:
+    """Tests for the shared SMTP connection pool."""
+
+    def test_reuses_and_recycles_connections(self):
+        """Test idle connections are reused until max_messages is reached."""
+        connect = MagicMock(side_effect=lambda: MagicMock(noop=Mock(return_value=(250, b"OK"))))
+        pool = SMTPConnectionPool(connect=connect, size=2, max_messages=2)
+
+        with pool.acquire() as first:
+            pass
+        with pool.acquire() as second:
+            pass
+        with pool.acquire() as third:
+            pass
+
+        assert first is second
+        assert third is not first
+        first.quit.assert_called_once()
+        assert connect.call_count == 2
+
+    def test_discards_connection_on_smtp_error(self):
+        """Test a connection that raised is not returned to the pool."""
+        connect = MagicMock(side_effect=lambda: MagicMock(noop=Mock(return_value=(250, b"OK"))))
+        pool = SMTPConnectionPool(connect=connect, size=1)
+
+        with pytest.raises(smtplib.SMTPServerDisconnected):
+            with pool.acquire() as broken:
+                raise smtplib.SMTPServerDisconnected()
+
+        with pool.acquire() as fresh:
+            pass
+
+        assert fresh is not broken
+        assert connect.call_count == 2
+
+
+class TestNotificationQueue:
+    """Tests for background notification delivery."""
+
+    def test_retries_failed_send(self):
+        """Test a send returning False is retried until it succeeds."""
+        send = Mock(side_effect=[False, True])
+        notification_queue = NotificationQueue(base_delay=0.01)
+
+        notification_queue.submit("slack", send, "#general", text="hi")
+
+        assert notification_queue.join(timeout=2)
+        assert send.call_count == 2
+        send.assert_called_with("#general", text="hi")
+        notification_queue.shutdown(timeout=2)
+
+    def test_drops_after_max_retries_and_opens_breaker(self):
+        """Test persistent failures are dropped and trip the breaker."""
+        send = Mock(side_effect=RuntimeError("slack down"))
+        notification_queue = NotificationQueue(
+            max_retries=1, base_delay=0.01, failure_threshold=2, reset_timeout=60
+        )
+
+        notification_queue.submit("slack", send)
+
+        assert notification_queue.join(timeout=2)
+        assert send.call_count == 2
+        assert notification_queue.breaker("slack").state == CircuitBreaker.OPEN
+        notification_queue.shutdown(timeout=2)
+
+    def test_open_breaker_holds_sends_without_spending_retries(self):
+        """Test sends submitted during an outage are delivered once it ends."""
+        outage = Mock(return_value=False)
+        send = Mock(return_value=True)
+        notification_queue = NotificationQueue(
+            max_retries=0, base_delay=0.01, failure_threshold=2, reset_timeout=0.2
+        )
+
+        notification_queue.submit("slack", outage)
+        notification_queue.submit("slack", outage)
+        assert notification_queue.join(timeout=2)
+        assert notification_queue.breaker("slack").state == CircuitBreaker.OPEN
+
+        for channel in ("#a", "#b", "#c"):
+            notification_queue.submit("slack", send, channel)
+
+        assert notification_queue.join(timeout=2)
+        assert send.call_count == 3
+        assert notification_queue.breaker("slack").state == CircuitBreaker.CLOSED
+        notification_queue.shutdown(timeout=2)
+
+    def test_half_open_breaker_allows_single_probe(self):
+        """Test only one call goes through until the half-open probe reports."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow() is True
+        assert breaker.allow() is False
+
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow() is True
+
+    def test_shutdown_hook_drains_queue(self):
+        """Test the app shutdown hook delivers sends still in the queue."""
+        from app.events import on_shutdown
+
+        send = Mock(return_value=True)
+        notification_queue = NotificationQueue()
+        notification_queue.submit("slack", send, "#general", text="bye")
+
+        with patch("app.events.get_notification_queue", return_value=notification_queue):
+            on_shutdown()
+
+        send.assert_called_once_with("#general", text="bye")
+
+
 class TestEmailNotificationService:
     """Tests for email notification service."""
 
@@ -601,3 +601,49 @@ class TestCalendarIntegrationAPI:
             CalendarIntegration.id == calendar_id
         ).first()
         assert calendar is None
+
+
+class TestInvoiceSlackNotifications:
+    """Tests for the invoice-ready Slack fan-out task."""
+
+    def test_queues_one_message_per_client_owner_binding(self):
+        """Test the client's owner binding gets a notify_invoice_binding task."""
+        from app.services.tasks import integrations as integration_tasks
+
+        invoice = Mock(id=uuid.uuid4(), client_id=uuid.uuid4(), invoice_number="INV-2026-09-0001", total_cents=12500)
+        owner_id = uuid.uuid4()
+        db = MagicMock()
+        invoice_query, binding_query = MagicMock(), MagicMock()
+        db.query.side_effect = [invoice_query, binding_query]
+        invoice_query.filter.return_value.first.return_value = invoice
+        bindings = binding_query.join.return_value.filter.return_value
+        bindings.all.return_value = [Mock(user_id=owner_id)]
+
+        with patch.object(integration_tasks, "TaskSession", return_value=db), \
+                patch.object(integration_tasks, "group") as group:
+            group.return_value.apply_async.return_value.id = "group-1"
+            result = integration_tasks.send_invoice_notifications(str(invoice.id))
+
+        assert result == {"total": 1, "queued": 1, "group_id": "group-1"}
+        join_target, join_on = binding_query.join.call_args.args
+        assert join_target is integration_tasks.Client
+        assert str(join_on) == "clients.created_by = slack_user_bindings.user_id"
+        signatures = list(group.call_args.args[0])
+        assert [sig.args for sig in signatures] == [("INV-2026-09-0001", 12500, str(owner_id))]
+
+    def test_no_opted_in_owner_queues_nothing(self):
+        """Test no group is published when the owner has no opted-in binding."""
+        from app.services.tasks import integrations as integration_tasks
+
+        db = MagicMock()
+        invoice_query, binding_query = MagicMock(), MagicMock()
+        db.query.side_effect = [invoice_query, binding_query]
+        invoice_query.filter.return_value.first.return_value = Mock(id=uuid.uuid4(), client_id=uuid.uuid4())
+        binding_query.join.return_value.filter.return_value.all.return_value = []
+
+        with patch.object(integration_tasks, "TaskSession", return_value=db), \
+                patch.object(integration_tasks, "group") as group:
+            result = integration_tasks.send_invoice_notifications(str(uuid.uuid4()))
+
+        assert result == {"total": 0, "queued": 0, "group_id": None}
+        group.assert_not_called()
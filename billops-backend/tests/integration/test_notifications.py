@@ -312,7 +312,7 @@ class TestSlackMessageFormatting:
             status="sent",
         )
 
-        assert "blocks" in message
+        assert "blocks" in message["attachments"][0]
         assert "text" in message
         assert "INV-2024-001" in message["text"]
 
@@ -324,9 +324,9 @@ class TestSlackMessageFormatting:
             amount=1500.00,
         )
 
-        assert "blocks" in message
+        assert "blocks" in message["attachments"][0]
         # Should contain payment information
-        assert len(message["blocks"]) > 0
+        assert len(message["attachments"][0]["blocks"]) > 0
 
     def test_format_daily_summary_message(self):
         """Test formatting daily summary message for Slack."""
@@ -336,9 +336,9 @@ class TestSlackMessageFormatting:
             entry_count=5,
         )
 
-        assert "blocks" in message
+        assert "blocks" in message["attachments"][0]
         # Should contain summary information
-        assert len(message["blocks"]) > 0
+        assert len(message["attachments"][0]["blocks"]) > 0
 
     def test_message_color_coding(self):
         """Test message color coding for different statuses."""
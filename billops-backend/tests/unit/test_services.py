@@ -3,7 +3,12 @@ Unit tests for services.
 """
 
 import pytest
+from concurrent.futures import Future
 from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+from sqlalchemy import Integer, create_engine, literal, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from unittest.mock import Mock, patch, MagicMock
 
@@ -14,9 +19,14 @@ from app.models.client import Client
 from app.models.project import Project
 from app.services.invoice import InvoiceService
 from app.services.time_entry import TimeEntryService
-from app.services.billing_rule import BillingRuleService
+from app.services.billing_rule import BillingRuleService, invalidate_active_rule
 from app.services.client import ClientService
 from app.services.project import ProjectService
+from app.services.integrations import token_refresh
+from app.services.tasks import billing as billing_tasks
+from app.services.tasks import invoices as invoice_tasks
+from app.services.tasks import time_capture as time_capture_tasks
+from app.utils.money import fmt_cents
 
 
 @pytest.mark.unit
@@ -326,3 +336,350 @@ class TestServiceErrorHandling:
             is_billable=True,
         )
         assert entry.duration_minutes == 0
+
+
+@pytest.mark.unit
+class TestMoneyFormatting:
+    """Tests for integer-cents formatting."""
+
+    def test_fmt_cents(self):
+        """Test cents are formatted with grouping and two decimals."""
+        assert fmt_cents(0) == "$0.00"
+        assert fmt_cents(5) == "$0.05"
+        assert fmt_cents(150000) == "$1,500.00"
+        assert fmt_cents(123456789) == "$1,234,567.89"
+
+    def test_fmt_cents_negative(self):
+        """Test negative amounts keep the sign before the symbol."""
+        assert fmt_cents(-150099) == "-$1,500.99"
+
+
+@pytest.mark.unit
+class TestActiveBillingRuleCache:
+    """Tests for the cached active billing rule lookup."""
+
+    def _rule(self, project_id):
+        return Mock(
+            id=uuid4(),
+            project_id=project_id,
+            rule_type="hourly",
+            rate_cents=15000,
+            rounding_increment_minutes=15,
+        )
+
+    def test_get_active_cached_hits_db_once(self):
+        """Test repeated lookups for a project reuse the cached snapshot."""
+        project_id = uuid4()
+        rule = self._rule(project_id)
+        with patch.object(BillingRuleService, "get_active_for_project", return_value=rule) as lookup:
+            first = BillingRuleService.get_active_cached(Mock(), project_id)
+            second = BillingRuleService.get_active_cached(Mock(), project_id)
+
+        assert lookup.call_count == 1
+        assert first is second
+        assert first.id == rule.id
+        assert first.rate_cents == 15000
+        assert first.rounding_increment_minutes == 15
+
+    def test_invalidate_active_rule(self):
+        """Test invalidation forces the next lookup back to the database."""
+        project_id = uuid4()
+        with patch.object(BillingRuleService, "get_active_for_project", return_value=None) as lookup:
+            assert BillingRuleService.get_active_cached(Mock(), project_id) is None
+            invalidate_active_rule(project_id)
+            BillingRuleService.get_active_cached(Mock(), project_id)
+
+        assert lookup.call_count == 2
+
+
+@pytest.mark.unit
+class TestOAuthRefreshDedup:
+    """Tests for the Redis-guarded OAuth token refresh."""
+
+    def test_lock_holder_refreshes_and_saves(self):
+        """Test the process that takes the lock refreshes, saves and releases."""
+        account = Mock(id=uuid4())
+        client = Mock()
+        client.set.return_value = True
+        refresh = Mock(return_value=True)
+        db = Mock()
+        db.in_transaction.return_value = False
+        with patch.object(token_refresh, "get_redis_client", return_value=client), \
+                patch.object(token_refresh, "_save_token") as save:
+            assert token_refresh.refresh_once(account, refresh, db) is True
+
+        refresh.assert_called_once_with(account)
+        save.assert_called_once_with(db, account)
+        client.eval.assert_called_once()
+
+    def test_open_transaction_is_rejected(self):
+        """Test the caller's pending work is never committed by the refresh."""
+        account = Mock(id=uuid4())
+        refresh = Mock(return_value=True)
+        db = Mock()
+        db.in_transaction.return_value = True
+        with patch.object(token_refresh, "get_redis_client") as get_client:
+            with pytest.raises(RuntimeError):
+                token_refresh.refresh_once(account, refresh, db)
+
+        db.commit.assert_not_called()
+        get_client.assert_not_called()
+        refresh.assert_not_called()
+
+    def test_waiter_reuses_saved_token(self):
+        """Test a process that loses the lock does not call the provider."""
+        account = Mock(id=uuid4())
+        client = Mock()
+        client.set.return_value = False
+        refresh = Mock(return_value=True)
+        db = Mock()
+        db.in_transaction.return_value = False
+        with patch.object(token_refresh, "get_redis_client", return_value=client), \
+                patch.object(token_refresh, "_wait_for_release", return_value=True) as wait, \
+                patch.object(token_refresh, "_load_saved_token", return_value=True):
+            assert token_refresh.refresh_once(account, refresh, db) is True
+
+        wait.assert_called_once()
+        refresh.assert_not_called()
+
+    def test_waiter_gives_up_while_lock_is_held(self):
+        """Test a waiter fails fast instead of refreshing the same token again."""
+        account = Mock(id=uuid4())
+        client = Mock()
+        client.set.return_value = False
+        client.exists.return_value = True
+        refresh = Mock(return_value=True)
+        db = Mock()
+        db.in_transaction.return_value = False
+        with patch.object(token_refresh, "get_redis_client", return_value=client), \
+                patch.object(token_refresh, "_WAIT_TIMEOUT", 0.05), \
+                patch.object(token_refresh, "_POLL_INTERVAL", 0.01):
+            assert token_refresh.refresh_once(account, refresh, db) is False
+
+        refresh.assert_not_called()
+        db.execute.assert_not_called()
+
+
+class TestInvoiceNumberSequence:
+    """Tests for per-month invoice number sequences."""
+
+    def test_number_uses_nextval_only(self):
+        """Test numbering inside the run's transaction issues no DDL."""
+        db = Mock()
+        db.execute.return_value.scalar_one.return_value = 7
+        period_start = datetime(2026, 9, 1, tzinfo=timezone.utc)
+
+        number = invoice_tasks._generate_invoice_number(db, period_start)
+
+        assert number == "INV-2026-09-0007"
+        db.execute.assert_called_once()
+        assert "CREATE" not in str(db.execute.call_args.args[0])
+
+    def test_concurrent_sequence_creation_is_ignored(self):
+        """Test losing the creation race to another run is not an error."""
+        conn = MagicMock()
+        conn.execute.side_effect = IntegrityError("CREATE SEQUENCE", {}, Exception("duplicate"))
+        engine = MagicMock()
+        engine.connect.return_value.execution_options.return_value.__enter__.return_value = conn
+        with patch.object(invoice_tasks, "engine", engine):
+            invoice_tasks._ensure_invoice_sequence(datetime(2026, 9, 1, tzinfo=timezone.utc))
+
+        engine.connect.return_value.execution_options.assert_called_once_with(isolation_level="AUTOCOMMIT")
+        assert "invoice_seq_2026_09" in str(conn.execute.call_args.args[0])
+
+
+class TestGeneratePendingInvoices:
+    """Tests for the monthly invoice generation task."""
+
+    def test_creates_one_draft_invoice_per_client(self):
+        """Test approved time is priced per client and stored as draft invoices."""
+        client_id = uuid4()
+        db = MagicMock()
+        totals = db.query.return_value.join.return_value.filter.return_value.group_by.return_value
+        # 90 minutes at 100.00/h for one user plus 30 minutes at 50.00/h for another
+        totals.all.return_value = [(client_id, 90 * 10000 + 30 * 5000)]
+        db.query.return_value.filter.return_value.all.return_value = []
+
+        with patch.object(invoice_tasks, "TaskSession", return_value=db), \
+                patch.object(invoice_tasks, "_ensure_invoice_sequence") as ensure, \
+                patch.object(invoice_tasks, "_generate_invoice_number", return_value="INV-2026-09-0001"):
+            summary = invoice_tasks.generate_pending_invoices.run(billing_period="2026-09")
+
+        assert summary["errors"] == []
+        assert summary["invoices_created"] == 1
+        assert summary["total_cents"] == 17500
+        ensure.assert_called_once()
+        invoice = db.add.call_args.args[0]
+        assert isinstance(invoice, Invoice)
+        assert invoice.client_id == client_id
+        assert invoice.total_cents == 17500
+        assert invoice.status == "draft"
+        assert invoice.meta["period_start"] == "2026-09-01T00:00:00+00:00"
+        assert invoice.meta["period_end"] == "2026-10-01T00:00:00+00:00"
+        db.commit.assert_called_once()
+
+    def test_updates_existing_invoice_for_period(self):
+        """Test a rerun updates the client's draft invoice instead of adding one."""
+        client_id = uuid4()
+        existing = Mock(client_id=client_id, tax_cents=800)
+        db = MagicMock()
+        totals = db.query.return_value.join.return_value.filter.return_value.group_by.return_value
+        totals.all.return_value = [(client_id, 60 * 10000)]
+        db.query.return_value.filter.return_value.all.return_value = [existing]
+
+        with patch.object(invoice_tasks, "TaskSession", return_value=db), \
+                patch.object(invoice_tasks, "_ensure_invoice_sequence"):
+            summary = invoice_tasks.generate_pending_invoices.run(billing_period="2026-09")
+
+        assert summary["invoices_updated"] == 1
+        assert existing.subtotal_cents == 10000
+        assert existing.total_cents == 10800
+        db.add.assert_not_called()
+
+    def test_sent_invoice_for_period_gets_a_new_draft(self):
+        """Test time approved after an invoice was sent goes on a new draft."""
+        client_id = uuid4()
+        db = MagicMock()
+        totals = db.query.return_value.join.return_value.filter.return_value.group_by.return_value
+        totals.all.return_value = [(client_id, 30 * 10000)]
+        # Only drafts are matched, so the client's sent invoice is not returned
+        db.query.return_value.filter.return_value.all.return_value = []
+
+        with patch.object(invoice_tasks, "TaskSession", return_value=db), \
+                patch.object(invoice_tasks, "_ensure_invoice_sequence"), \
+                patch.object(invoice_tasks, "_generate_invoice_number", return_value="INV-2026-09-0002"):
+            summary = invoice_tasks.generate_pending_invoices.run(billing_period="2026-09")
+
+        existing_filter = [
+            str(criterion.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+            for criterion in db.query.return_value.filter.call_args.args
+        ]
+        assert "invoices.status = 'draft'" in existing_filter
+        assert summary["invoices_created"] == 1
+        assert summary["invoices_updated"] == 0
+        invoice = db.add.call_args.args[0]
+        assert invoice.status == "draft"
+        assert invoice.total_cents == 5000
+
+    def test_failing_client_rolls_back_alone(self):
+        """Test one client's failed write does not drop the other invoices."""
+        failing_id, ok_id = uuid4(), uuid4()
+        db = MagicMock()
+        totals = db.query.return_value.join.return_value.filter.return_value.group_by.return_value
+        totals.all.return_value = [(failing_id, 60 * 10000), (ok_id, 60 * 5000)]
+        db.query.return_value.filter.return_value.all.return_value = []
+        numbers = iter([RuntimeError("sequence unavailable"), "INV-2026-09-0001"])
+
+        def next_number(session, period_start):
+            number = next(numbers)
+            if isinstance(number, Exception):
+                raise number
+            return number
+
+        with patch.object(invoice_tasks, "TaskSession", return_value=db), \
+                patch.object(invoice_tasks, "_ensure_invoice_sequence"), \
+                patch.object(invoice_tasks, "_generate_invoice_number", side_effect=next_number):
+            summary = invoice_tasks.generate_pending_invoices.run(billing_period="2026-09")
+
+        assert db.begin_nested.call_count == 2
+        assert summary["errors"] == [{"client_id": str(failing_id), "error": "sequence unavailable"}]
+        assert summary["invoices_created"] == 1
+        assert list(summary["by_client"]) == [str(ok_id)]
+        db.commit.assert_called_once()
+
+
+class TestAggregateDailyTimeEntries:
+    """Tests for the daily time entry aggregation task."""
+
+    def test_totals_and_top_entries_come_from_sql(self):
+        """Test per-user totals and the summary entries are read from two queries."""
+        user_id = uuid4()
+        entry_id = uuid4()
+        db = MagicMock()
+        db.execute.side_effect = [
+            Mock(all=Mock(return_value=[Mock(user_id=user_id, mins=150, bmins=90, n=3)])),
+            Mock(all=Mock(return_value=[
+                Mock(id=entry_id, user_id=user_id, description="Review", duration_minutes=90, billable=True),
+            ])),
+        ]
+        user = Mock(email="ann@example.com")
+        user.name = "Ann"
+        db.query.return_value.filter.return_value.first.return_value = user
+        email_service = Mock()
+
+        with patch.object(time_capture_tasks, "SessionLocal", return_value=db), \
+                patch.object(time_capture_tasks, "get_email_notification_service", return_value=email_service):
+            result = time_capture_tasks.aggregate_daily_time_entries.run(date_str="2026-09-14")
+
+        totals_sql, entries_sql = (
+            str(call.args[0].compile(dialect=postgresql.dialect())) for call in db.execute.call_args_list
+        )
+        assert "GROUP BY time_entries.user_id" in totals_sql
+        assert "time_entries.started_at >= " in totals_sql
+        assert "PARTITION BY time_entries.user_id ORDER BY time_entries.started_at" in entries_sql
+
+        summary = result["summary_by_user"][str(user_id)]
+        assert result["total_entries"] == 3
+        assert summary["entry_count"] == 3
+        assert summary["total_hours"] == 2.5
+        assert summary["total_billable_hours"] == 1.5
+        assert summary["entries"] == [{
+            "id": str(entry_id),
+            "description": "Review",
+            "duration_hours": 1.5,
+            "billable": True,
+        }]
+        email_service.send_time_entry_reminder.assert_called_once()
+        reminder = email_service.send_time_entry_reminder.call_args.kwargs
+        assert reminder["user_name"] == "Ann"
+        assert reminder["entry_count"] == 3
+
+
+class TestInvoicePdfUploadCleanup:
+    """Tests for S3 cleanup when invoice generation rolls back."""
+
+    def test_uploaded_pdf_is_deleted_when_db_work_fails(self):
+        """Test a failed flush waits for the upload and removes the PDF."""
+        invoice = Mock(id=uuid4(), invoice_number="INV-2026-09-0001", meta=None, project=None, tax_cents=0)
+        db = MagicMock()
+        db.query.return_value.options.return_value.filter.return_value.first.return_value = invoice
+        db.scalars.return_value = [Mock()]
+        db.scalar.return_value = 10000
+        db.flush.side_effect = RuntimeError("flush failed")
+        session_factory = Mock()
+        session_factory.begin.return_value.__enter__ = Mock(return_value=db)
+        session_factory.begin.return_value.__exit__ = Mock(return_value=False)
+
+        # The upload has already finished, so it cannot be cancelled
+        finished = Future()
+        finished.set_result("https://bucket.s3.us-east-1.amazonaws.com/invoices/INV-2026-09-0001.pdf")
+        executor = Mock()
+        executor.submit.return_value = finished
+
+        with patch.object(billing_tasks, "SessionLocal", session_factory), \
+                patch.object(billing_tasks, "generate_invoice_pdf"), \
+                patch.object(billing_tasks, "_get_upload_executor", return_value=executor), \
+                patch.object(billing_tasks, "delete_from_s3") as delete, \
+                patch.object(billing_tasks.generate_invoice_task, "retry", side_effect=RuntimeError("retry")):
+            result = billing_tasks.generate_invoice_task.run(invoice.id)
+
+        assert result["status"] == "error"
+        delete.assert_called_once_with("invoices/INV-2026-09-0001.pdf")
+
+
+class TestLineAmountRounding:
+    """Tests for rounding invoice line amounts to the cent in SQL."""
+
+    def test_halves_round_to_even_like_python(self):
+        """Test .5 cent amounts round as Python's round() does, not away from zero."""
+        engine = create_engine("sqlite://")
+        # 15, 45 and 75 minutes at 24.30/h land exactly on half a cent
+        cent_minutes = [minutes * 2430 for minutes in (15, 30, 45, 60, 75)] + [59, 61, 89, 90, 91]
+        with engine.connect() as conn:
+            amounts = [
+                conn.scalar(select(billing_tasks._round_half_even_div(literal(value, Integer), 60)))
+                for value in cent_minutes
+            ]
+
+        assert amounts == [round(value / 60) for value in cent_minutes]
+        assert amounts[:5] == [608, 1215, 1822, 2430, 3038]